@@ -0,0 +1,275 @@
+"""Headless batch runner: refines a folder (or JSONL manifest) of resumes against a job description.
+
+Usage:
+    python batch.py resumes/ --jd job.txt --out refined/
+    python batch.py manifest.jsonl --jd https://example.com/job --workers 8 --llm-concurrency 4
+
+A manifest line looks like {"resume": "path/to/cv.pdf", "id": "cand-42",
+"job_description": "...", "position_title": "...", "photo": "path/to/photo.jpg"};
+only "resume" is required, the rest fall back to the command-line values.
+
+CPU stages (extraction, language detection, keywords, section parsing, PDF
+rendering) run in a process pool; LLM calls go through one LLMClient capped
+at --llm-concurrency in-flight requests and --rpm requests per minute, with
+retries on 429/5xx, so a large batch cannot blow through the API quota.
+
+--dedup-index flags resumes that are near-duplicates of ones seen before
+(see dedup.py); --reuse-duplicates renders them from the earlier refinement.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from dedup import DEFAULT_THRESHOLD, NearDuplicateIndex, refinement_key
+from llm_cache import ResponseCache
+from llm_client import LLMClient, get_llm_client, make_backend
+from pipeline import (
+    analyze_resume,
+    batch_refine_resume_gemini,
+    create_modern_resume_pdf,
+    fetch_job_description,
+)
+
+RESUME_EXTENSIONS = ('.pdf', '.docx')
+
+
+def load_jobs(source, job_description, position_title):
+    """Builds the job list from a directory of resumes or a JSONL manifest.
+
+    Every job gets a unique id: the file name without its extension, plus the
+    extension when two resumes share a name. Raises ValueError when a manifest
+    repeats an explicit id.
+    """
+    jobs = []
+    if os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            if entry.lower().endswith(RESUME_EXTENSIONS):
+                jobs.append({"resume": os.path.join(source, entry)})
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if not os.path.isabs(record["resume"]):
+                    record["resume"] = os.path.join(base_dir, record["resume"])
+                if record.get("photo") and not os.path.isabs(record["photo"]):
+                    record["photo"] = os.path.join(base_dir, record["photo"])
+                jobs.append(record)
+
+    explicit_ids = [job["id"] for job in jobs if job.get("id")]
+    repeated = sorted({job_id for job_id in explicit_ids if explicit_ids.count(job_id) > 1})
+    if repeated:
+        raise ValueError(f"duplicate ids in {source}: {', '.join(repeated)}")
+
+    # Ids name the output PDFs, so cv.pdf and cv.docx must not share the id "cv".
+    stems = [os.path.splitext(os.path.basename(job["resume"]))[0] for job in jobs if not job.get("id")]
+    taken = set(explicit_ids)
+    for job in jobs:
+        if not job.get("id"):
+            stem, ext = os.path.splitext(os.path.basename(job["resume"]))
+            job_id = stem if stems.count(stem) == 1 and stem not in taken else f"{stem}-{ext.lstrip('.').lower()}"
+            suffix = 2
+            while job_id in taken:
+                job_id = f"{stem}-{ext.lstrip('.').lower()}-{suffix}"
+                suffix += 1
+            job["id"] = job_id
+        taken.add(job["id"])
+
+    for job in jobs:
+        job.setdefault("job_description", job_description)
+        job.setdefault("position_title", position_title)
+        job.setdefault("photo", None)
+    return jobs
+
+
+def read_job_description(value):
+    """Accepts a URL, a path to a text file, or the job description text itself."""
+    if value and os.path.isfile(value):
+        with open(value, encoding="utf-8") as f:
+            return f.read()
+    return fetch_job_description(value or "")
+
+
+def refine_job(job, analysis, response_cache=None, llm_client=None, per_section=False):
+    """LLM stage for one job; runs in the LLM thread pool."""
+    return batch_refine_resume_gemini(
+        analysis["sections"], analysis["resume_keywords"], analysis["jd_keywords"],
+        None, analysis["language"], job["position_title"],
+        response_cache=response_cache, llm_client=llm_client, per_section=per_section
+    )
+
+
+def render_job(refined_sections, pdf_path, personal_info, photo):
+    """PDF stage for one job; runs in the process pool."""
+    create_modern_resume_pdf(refined_sections, pdf_path, personal_info, photo)
+    return os.path.exists(pdf_path)
+
+
+def run_batch(jobs, out_dir, workers=None, llm_concurrency=4, response_cache=None, llm_client=None,
+              per_section=False, dedup_index=None, reuse_duplicates=False, run_id=None):
+    """Runs every job through analyze -> refine -> render and returns one result dict per job.
+
+    With a dedup_index (dedup.NearDuplicateIndex) each resume is fingerprinted
+    at ingest and its nearest earlier duplicate is reported. With
+    reuse_duplicates, a duplicate already refined for the same job
+    description and position is rendered from that refinement, skipping the LLM.
+    Resumes are indexed as "<job id>@<run_id>" (run_id defaults to the start
+    time), so a file resubmitted under the same name in a later run is matched
+    against its earlier submission instead of replacing it.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    model_name = (llm_client or get_llm_client()).model_name if dedup_index is not None else None
+    run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+    results = {job["id"]: {"id": job["id"], "resume": job["resume"], "status": "pending"} for job in jobs}
+    jobs_by_id = {job["id"]: job for job in jobs}
+    started = {job["id"]: time.perf_counter() for job in jobs}
+
+    with ProcessPoolExecutor(max_workers=workers) as cpu_pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency) as llm_pool:
+        analysis_futures = {
+            cpu_pool.submit(analyze_resume, job["resume"], job["job_description"]): job["id"]
+            for job in jobs
+        }
+
+        refine_futures = {}
+        analyses = {}
+        for future in as_completed(analysis_futures):
+            job_id = analysis_futures[future]
+            try:
+                analysis = future.result()
+            except Exception as e:
+                results[job_id].update(status="failed", stage="analyze", error=str(e))
+                continue
+            if not analysis:
+                results[job_id].update(status="failed", stage="analyze", error="no text extracted")
+                continue
+            analyses[job_id] = analysis
+            results[job_id]["language"] = analysis["language"]
+            if dedup_index is not None:
+                job = jobs_by_id[job_id]
+                analysis["dedup_id"] = f"{job_id}@{run_id}"
+                matches = dedup_index.ingest(analysis["dedup_id"], sections=analysis["sections"])
+                context_key = refinement_key(job["job_description"], job["position_title"],
+                                             analysis["language"], model_name)
+                analysis["refinement_key"] = context_key
+                if matches:
+                    results[job_id].update(duplicate_of=matches[0][0], similarity=round(matches[0][1], 3))
+                source_id, refined = (dedup_index.reuse_refinement(matches, context_key)
+                                      if reuse_duplicates else (None, None))
+                if refined:
+                    results[job_id]["reused_refinement_from"] = source_id
+                    reused = Future()
+                    reused.set_result(refined)
+                    refine_futures[reused] = job_id
+                    continue
+            refine_futures[llm_pool.submit(
+                refine_job, jobs_by_id[job_id], analysis, response_cache, llm_client, per_section)] = job_id
+
+        render_futures = {}
+        for future in as_completed(refine_futures):
+            job_id = refine_futures[future]
+            refined_sections = future.result()
+            if not refined_sections:
+                results[job_id].update(status="failed", stage="refine", error="refinement returned no content")
+                continue
+            if dedup_index is not None and "reused_refinement_from" not in results[job_id]:
+                dedup_index.record_refinement(
+                    analyses[job_id]["dedup_id"], analyses[job_id]["refinement_key"], refined_sections)
+            pdf_path = os.path.join(out_dir, f"{job_id}.pdf")
+            render_futures[cpu_pool.submit(
+                render_job, refined_sections, pdf_path,
+                analyses[job_id]["personal_info"], jobs_by_id[job_id]["photo"]
+            )] = (job_id, pdf_path)
+
+        for future in as_completed(render_futures):
+            job_id, pdf_path = render_futures[future]
+            try:
+                rendered = future.result()
+            except Exception as e:
+                results[job_id].update(status="failed", stage="render", error=str(e))
+                continue
+            if rendered:
+                results[job_id].update(status="ok", pdf=pdf_path)
+            else:
+                results[job_id].update(status="failed", stage="render", error="PDF was not written")
+
+    for job_id, result in results.items():
+        result["seconds"] = round(time.perf_counter() - started[job_id], 3)
+    return [results[job["id"]] for job in jobs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refine a batch of resumes against a job description.")
+    parser.add_argument("source", help="Directory of PDF/DOCX resumes or a JSONL manifest")
+    parser.add_argument("--jd", default="", help="Job description: URL, text file path or literal text")
+    parser.add_argument("--position-title", default="Software Engineer")
+    parser.add_argument("--out", default="refined_resumes", help="Output directory for PDFs and results.jsonl")
+    parser.add_argument("--api-key", default=(os.environ.get("GEMINI_API_KEYS") or os.environ.get("GEMINI_API_KEY")
+                                              or os.environ.get("GOOGLE_API_KEY")),
+                        help="Gemini API key, or comma-separated keys to pool (defaults to $GEMINI_API_KEYS, "
+                             "$GEMINI_API_KEY or $GOOGLE_API_KEY)")
+    parser.add_argument("--backend", choices=["gemini", "openai", "stub"],
+                        default=os.environ.get("LLM_BACKEND", "gemini"),
+                        help="LLM backend (defaults to $LLM_BACKEND or gemini; stub runs offline)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for CPU stages")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Max concurrent Gemini requests")
+    parser.add_argument("--rpm", type=float, default=60, help="Max Gemini requests per minute")
+    parser.add_argument("--per-section", action="store_true",
+                        help="Refine each section in its own concurrent request instead of one prompt per resume")
+    parser.add_argument("--response-cache", default=None,
+                        help="SQLite file for caching Gemini responses between runs")
+    parser.add_argument("--dedup-index", default=os.environ.get("DEDUP_INDEX_PATH"),
+                        help="Near-duplicate index (.db or .npz) that flags resubmitted resumes "
+                             "(defaults to $DEDUP_INDEX_PATH)")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Estimated similarity at which two resumes count as duplicates")
+    parser.add_argument("--reuse-duplicates", action="store_true",
+                        help="Reuse a near-duplicate's refinement for the same job instead of calling the LLM")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    if args.backend == "gemini" and not args.api_key:
+        parser.error("a Gemini API key is required (--api-key, $GEMINI_API_KEY or $GEMINI_API_KEYS)")
+
+    try:
+        jobs = load_jobs(args.source, read_job_description(args.jd), args.position_title)
+    except ValueError as e:
+        parser.error(str(e))
+    missing_jd = [job["id"] for job in jobs if not job["job_description"]]
+    if missing_jd:
+        parser.error(f"no job description for: {', '.join(missing_jd)}")
+    if not jobs:
+        parser.error(f"no resumes found in {args.source}")
+
+    response_cache = ResponseCache(args.response_cache) if args.response_cache else None
+    llm_client = LLMClient(requests_per_minute=args.rpm, max_concurrency=args.llm_concurrency,
+                           backend=make_backend(args.backend, api_keys=args.api_key and args.api_key.split(",")))
+    dedup_index = NearDuplicateIndex(args.dedup_index, args.dedup_threshold) if args.dedup_index else None
+    results = run_batch(jobs, args.out, args.workers, args.llm_concurrency, response_cache, llm_client,
+                        args.per_section, dedup_index, args.reuse_duplicates)
+    if response_cache is not None:
+        logging.info("response cache: %s", response_cache.stats())
+    if dedup_index is not None:
+        logging.info("dedup index: %s", dedup_index.stats())
+        dedup_index.close()
+
+    manifest_path = os.path.join(args.out, "results.jsonl")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print(f"{ok}/{len(results)} resumes refined; manifest written to {manifest_path}")
+    return 0 if ok == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Benchmarks for the CPU stages of the pipeline on a seeded synthetic corpus (see bench_corpus.py).
+
+Each case is timed with timeit (auto-ranged loop count, median of --repeat
+runs) for every size and language. The report lists the time per call,
+throughput (calls/s and input MB/s) and the peak Python memory of one call,
+measured separately with tracemalloc. Save a run as a baseline, and later
+runs fail (exit code 1) when a case gets slower or uses more memory than
+the baseline by more than --threshold:
+
+    python bench.py --save bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.25
+
+Baselines are only comparable on the same machine and Python version.
+
+--startup instead checks cold start against fixed budgets, in fresh
+interpreters: the import time of pipeline.py, plus the first run and a rerun of
+main.py under Streamlit's AppTest (the work every widget interaction repeats):
+
+    python bench.py --startup --import-budget 0.5 --rerun-budget 0.3
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+import bench_corpus
+from jd_fetcher import extract_main_content
+from language import LanguageDetector
+from pipeline import (
+    create_cover_letter_pdf,
+    create_modern_resume_pdf,
+    extract_keywords,
+    extract_personal_details,
+    extract_text,
+    parse_resume_sections,
+)
+
+
+def build_inputs(seed, language, size):
+    """Generates the documents for one (language, size) pair; not timed."""
+    resume = bench_corpus.generate_resume(seed, language, size)
+    jd = bench_corpus.generate_job_description(seed, language, size)
+    text = bench_corpus.resume_text(resume)
+    return {
+        "language": language,
+        "personal_info": resume["personal_info"],
+        "text": text,
+        "docx": bench_corpus.resume_docx(resume),
+        "pdf": bench_corpus.resume_pdf(resume),
+        "sections": parse_resume_sections(text),
+        "jd_text": bench_corpus.job_description_text(jd),
+        "jd_html": bench_corpus.job_description_html(jd),
+        "cover_letter": {
+            "opening": jd["paragraphs"][0],
+            "body_paragraphs": jd["paragraphs"][1:4],
+            "achievements": [line for _, lines in resume["sections"][1:2] for line in lines[1:4]],
+            "closing": jd["paragraphs"][-1],
+        },
+        "company_info": {"date": "October 17, 2026", "recruiter": "Hiring Manager",
+                         "company": jd["company"], "company_city": "Paris"},
+        "position_title": jd["title"],
+    }
+
+
+def _size(value):
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+
+# Memoization is disabled so every call classifies; profiles load once, before timing.
+_uncached_detector = LanguageDetector(max_entries=0)
+
+# name -> inputs -> (callable, input size in bytes)
+CASES = {
+    "extract_text[docx]": lambda d: (lambda: extract_text(d["docx"], file_type="docx"), _size(d["docx"])),
+    "extract_text[pdf]": lambda d: (lambda: extract_text(d["pdf"], file_type="pdf"), _size(d["pdf"])),
+    "extract_personal_details": lambda d: (lambda: extract_personal_details(d["text"]), _size(d["text"])),
+    "parse_resume_sections": lambda d: (lambda: parse_resume_sections(d["text"]), _size(d["text"])),
+    "extract_keywords": lambda d: (lambda: extract_keywords(d["jd_text"], language=d["language"]),
+                                   _size(d["jd_text"])),
+    "detect_language": lambda d: (lambda: _uncached_detector.detect(d["text"]), _size(d["text"])),
+    "extract_main_content": lambda d: (lambda: extract_main_content(d["jd_html"]), _size(d["jd_html"])),
+    "create_modern_resume_pdf": lambda d: (
+        lambda: create_modern_resume_pdf(d["sections"], None, d["personal_info"]), _size(d["text"])),
+    "create_cover_letter_pdf": lambda d: (
+        lambda: create_cover_letter_pdf(None, d["personal_info"], d["company_info"], d["position_title"],
+                                        d["cover_letter"], d["language"]),
+        _size(json.dumps(d["cover_letter"]))),
+}
+
+
+def measure(func, input_bytes, repeat):
+    """Median seconds per call, throughput and peak traced memory for one case."""
+    func()  # warm-up: imports, lazily built styles and profiles
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    seconds = statistics.median(t / number for t in timer.repeat(repeat, number))
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "calls_per_second": 1 / seconds if seconds else float("inf"),
+        "mb_per_second": input_bytes / seconds / 1e6 if seconds else float("inf"),
+        "input_bytes": input_bytes,
+        "peak_bytes": peak,
+    }
+
+
+def run(seed, sizes, languages, cases, repeat):
+    results = {}
+    for size in sizes:
+        for language in languages:
+            inputs = build_inputs(seed, language, size)
+            for name in cases:
+                func, input_bytes = CASES[name](inputs)
+                results[f"{name}[{size},{language}]"] = measure(func, input_bytes, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns (key, metric, old, new) for every case slower or heavier than baseline by more than threshold."""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if old[metric] and result[metric] > old[metric] * (1 + threshold):
+                regressions.append((key, metric, old[metric], result[metric]))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    header = f"{'case':<52} {'ms/call':>10} {'calls/s':>10} {'MB/s':>8} {'peak KB':>9}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    for key, r in results.items():
+        line = (f"{key:<52} {r['seconds'] * 1000:>10.3f} {r['calls_per_second']:>10.1f} "
+                f"{r['mb_per_second']:>8.2f} {r['peak_bytes'] / 1024:>9.0f}")
+        if baseline and key in baseline and baseline[key]["seconds"]:
+            line += f" {r['seconds'] / baseline[key]['seconds'] - 1:>+8.0%}"
+        print(line)
+
+
+# --- Startup budget ---
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_SCRIPT = "import time; t = time.perf_counter(); import pipeline; print(time.perf_counter() - t)"
+APP_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=120)
+t = time.perf_counter(); app.run(); first = time.perf_counter() - t
+t = time.perf_counter(); app.run(); rerun = time.perf_counter() - t
+assert not app.exception, app.exception
+print(first, rerun)
+"""
+
+
+def _run_python(script):
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"startup probe failed:\n{result.stderr}")
+    return [float(value) for value in result.stdout.split()]
+
+
+def measure_startup(repeat):
+    """Median seconds for importing pipeline, the first run of main.py and a rerun, each in a fresh process."""
+    imports = [_run_python(IMPORT_SCRIPT)[0] for _ in range(repeat)]
+    app_runs = [_run_python(APP_SCRIPT) for _ in range(repeat)]
+    return {
+        "import_pipeline": statistics.median(imports),
+        "app_first_run": statistics.median(first for first, _ in app_runs),
+        "app_rerun": statistics.median(rerun for _, rerun in app_runs),
+    }
+
+
+def check_startup(args):
+    budgets = {"import_pipeline": args.import_budget, "app_first_run": args.first_run_budget,
+               "app_rerun": args.rerun_budget}
+    timings = measure_startup(args.repeat)
+    over = 0
+    for name, seconds in timings.items():
+        status = "ok" if seconds <= budgets[name] else "OVER BUDGET"
+        over += status != "ok"
+        print(f"{name:<20} {seconds * 1000:>8.0f} ms  (budget {budgets[name] * 1000:.0f} ms)  {status}")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "startup": timings, "budgets": budgets}, f, indent=2)
+    return 1 if over else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline's CPU stages on a synthetic corpus.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", nargs="+", choices=list(bench_corpus.SIZES), default=list(bench_corpus.SIZES))
+    parser.add_argument("--languages", nargs="+", choices=bench_corpus.LANGUAGES,
+                        default=list(bench_corpus.LANGUAGES))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (median is reported)")
+    parser.add_argument("--save", help="Write results as JSON (usable as a later --baseline)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown / memory growth over the baseline (0.25 = 25%%)")
+    parser.add_argument("--startup", action="store_true", help="Check cold start/rerun budgets instead")
+    parser.add_argument("--import-budget", type=float, default=0.5, help="Seconds to import pipeline.py")
+    parser.add_argument("--first-run-budget", type=float, default=2.0, help="Seconds for the first run of main.py")
+    parser.add_argument("--rerun-budget", type=float, default=0.3, help="Seconds for a rerun of main.py")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        return check_startup(args)
+
+    logging.getLogger("resume_pipeline").setLevel(logging.WARNING)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = run(args.seed, args.sizes, args.languages, args.cases, args.repeat)
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "seed": args.seed, "results": results}, f, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for key, metric, old, new in regressions:
+            print(f"REGRESSION {key} {metric}: {old:.6g} -> {new:.6g} ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Seeded synthetic corpus for benchmarks: resumes (DOCX, PDF, text) and job descriptions (HTML, text).
+
+Everything is derived from random.Random(seed), so a given seed, language and
+size always produce the same documents. Sizes scale the number of experience
+entries and bullets; "large" resumes span well over PDF_PAGES_PER_WORKER pages.
+
+Write a corpus to disk, with a manifest usable by batch.py:
+    python bench_corpus.py out_dir/ --seed 7 --sizes small large
+"""
+import argparse
+import io
+import json
+import os
+import random
+
+from docx import Document
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+LANGUAGES = ("english", "french")
+# (experience entries, bullets per entry, job description paragraphs)
+SIZES = {"small": (2, 3, 2), "medium": (8, 5, 6), "large": (40, 6, 20)}
+
+FIRST_NAMES = ["Jane", "Amine", "Claire", "Marco", "Sofia", "Lucas", "Priya", "Hugo", "Emma", "Noah"]
+LAST_NAMES = ["Martin", "Nguyen", "Dubois", "Smith", "Rossi", "Bernard", "Patel", "Moreau", "Garcia", "Lefebvre"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Analytics", "Hooli", "Stark Systems", "Wayne Data",
+             "Soylent Labs", "Cyberdyne", "Tyrell Software"]
+CITIES = ["Paris", "Lyon", "Montreal", "London", "Toronto", "Berlin", "Brussels", "Geneva"]
+SKILLS = ["Python", "Go", "Kubernetes", "Docker", "PostgreSQL", "Kafka", "Terraform", "AWS", "GCP", "React",
+          "TypeScript", "Spark", "Airflow", "Redis", "GraphQL", "FastAPI", "Django", "PyTorch", "Pandas", "Linux"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+VOCABULARY = {
+    "english": {
+        "headings": {"summary": "Professional Summary", "experience": "Work Experience", "projects": "Projects",
+                     "education": "Education", "skills": "Technical Skills", "languages": "Languages"},
+        "roles": ["Software Engineer", "Data Engineer", "Backend Developer", "Platform Engineer",
+                  "Machine Learning Engineer", "Engineering Manager"],
+        "verbs": ["Designed", "Developed", "Led", "Implemented", "Built", "Optimized", "Improved", "Managed"],
+        "objects": ["a distributed ingestion pipeline", "the billing service", "an internal developer platform",
+                    "real-time fraud detection", "the CI/CD workflow", "a customer analytics dashboard",
+                    "the search ranking model", "a multi-region deployment"],
+        "results": ["reducing latency by {n}%", "cutting cloud costs by {n}%", "serving {n}k requests per second",
+                    "for a team of {n} engineers", "improving conversion by {n}%"],
+        "summary": "{role} with {n} years of experience building reliable, scalable systems in {a} and {b}.",
+        "using": "using {a} and {b}",
+        "degree": "MSc in Computer Science, {school}",
+        "spoken": "English (native), French (professional)",
+        "jd_title": "Senior {role}",
+        "jd_intro": "{company} is looking for a {role} to join our {city} team.",
+        "jd_sentences": ["You will design and operate services in {a} and {b}.",
+                         "Experience with {a} is required and {b} is a plus.",
+                         "You will mentor engineers and review designs.",
+                         "We value ownership, clear writing and pragmatic engineering.",
+                         "You will work closely with product and data teams on {a} pipelines."],
+        "jd_benefits": "We offer flexible hours, remote work and a learning budget.",
+    },
+    "french": {
+        "headings": {"summary": "Profil professionnel", "experience": "Expérience professionnelle",
+                     "projects": "Projets", "education": "Formation", "skills": "Compétences techniques",
+                     "languages": "Langues"},
+        "roles": ["Ingénieur logiciel", "Ingénieur données", "Développeur backend", "Ingénieur plateforme",
+                  "Ingénieur en apprentissage automatique", "Responsable d'équipe technique"],
+        "verbs": ["Conçu", "Développé", "Dirigé", "Mis en place", "Construit", "Optimisé", "Amélioré", "Géré"],
+        "objects": ["un pipeline d'ingestion distribué", "le service de facturation",
+                    "une plateforme interne pour les développeurs", "la détection de fraude en temps réel",
+                    "la chaîne d'intégration continue", "un tableau de bord d'analyse client",
+                    "le modèle de classement de la recherche", "un déploiement multi-régions"],
+        "results": ["en réduisant la latence de {n} %", "en diminuant les coûts cloud de {n} %",
+                    "avec {n} milliers de requêtes par seconde", "pour une équipe de {n} ingénieurs",
+                    "en améliorant la conversion de {n} %"],
+        "summary": "{role} avec {n} ans d'expérience dans la construction de systèmes fiables et évolutifs "
+                   "en {a} et {b}.",
+        "using": "avec {a} et {b}",
+        "degree": "Master en informatique, {school}",
+        "spoken": "Français (langue maternelle), anglais (courant)",
+        "jd_title": "{role} confirmé",
+        "jd_intro": "{company} recherche un {role} pour rejoindre son équipe de {city}.",
+        "jd_sentences": ["Vous concevrez et exploiterez des services en {a} et {b}.",
+                         "Une expérience avec {a} est requise et {b} est un atout.",
+                         "Vous accompagnerez les ingénieurs et relirez les conceptions.",
+                         "Nous valorisons l'autonomie, la clarté de l'écrit et une ingénierie pragmatique.",
+                         "Vous travaillerez avec les équipes produit et données sur des pipelines {a}."],
+        "jd_benefits": "Nous proposons des horaires flexibles, du télétravail et un budget formation.",
+    },
+}
+SCHOOLS = ["Université Paris-Saclay", "EPFL", "McGill University", "Imperial College London", "INSA Lyon"]
+
+
+def generate_resume(seed, language="english", size="medium"):
+    """Returns a resume as {"personal_info": {...}, "sections": [(heading, lines), ...]}."""
+    rng = random.Random(f"resume-{seed}-{language}-{size}")
+    vocab = VOCABULARY[language]
+    entries, bullets_per_entry, _ = SIZES[size]
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    personal_info = {
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}@example.com",
+        "phone": f"+33 6 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+        "linkedin": f"linkedin.com/in/{first.lower()}{last.lower()}",
+        "github": f"github.com/{first.lower()}{last.lower()}",
+    }
+
+    def bullet():
+        line = f"{rng.choice(vocab['verbs'])} {rng.choice(vocab['objects'])}"
+        line += " " + rng.choice(vocab["results"]).format(n=rng.randint(2, 60))
+        return f"{line} {vocab['using'].format(a=rng.choice(SKILLS), b=rng.choice(SKILLS))}."
+
+    headings = vocab["headings"]
+    experience = []
+    year = 2024
+    for _ in range(entries):
+        start = year - rng.randint(1, 3)
+        title = (f"{rng.choice(COMPANIES)} – {rng.choice(vocab['roles'])} | "
+                 f"{rng.choice(MONTHS)} {start} - {rng.choice(MONTHS)} {year}")
+        experience.append(title)
+        experience.extend(bullet() for _ in range(bullets_per_entry))
+        year = start
+    projects = []
+    for _ in range(max(1, entries // 2)):
+        projects.append(f"{rng.choice(['Journal', 'Budget', 'Transit', 'Recipe'])} App")
+        projects.extend(bullet() for _ in range(2))
+
+    sections = [
+        (headings["summary"], [vocab["summary"].format(role=rng.choice(vocab["roles"]), n=rng.randint(3, 15),
+                                                       a=rng.choice(SKILLS), b=rng.choice(SKILLS))]),
+        (headings["experience"], experience),
+        (headings["projects"], projects),
+        (headings["education"], [vocab["degree"].format(school=rng.choice(SCHOOLS))]),
+        (headings["skills"], [", ".join(rng.sample(SKILLS, 10))]),
+        (headings["languages"], [vocab["spoken"]]),
+    ]
+    return {"personal_info": personal_info, "sections": sections}
+
+
+def resume_text(resume):
+    """Plain text as extract_text would return it: contact lines, then headings and lines."""
+    info = resume["personal_info"]
+    lines = [info["name"], f"{info['email']} | {info['phone']}", f"{info['linkedin']} | {info['github']}"]
+    for heading, content in resume["sections"]:
+        lines.append(heading)
+        lines.extend(content)
+    return "\n".join(lines)
+
+
+def resume_docx(resume):
+    """The resume as DOCX bytes, one paragraph per line."""
+    document = Document()
+    for line in resume_text(resume).split("\n"):
+        document.add_paragraph(line)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def resume_pdf(resume):
+    """The resume as (possibly multi-page) PDF bytes with a text layer."""
+    styles = getSampleStyleSheet()
+    story = []
+    for line in resume_text(resume).split("\n"):
+        story.append(Paragraph(line.replace("&", "&amp;"), styles["BodyText"]))
+    story.append(Spacer(1, 1))
+    output = io.BytesIO()
+    SimpleDocTemplate(output, pagesize=letter).build(story)
+    return output.getvalue()
+
+
+def generate_job_description(seed, language="english", size="medium"):
+    """Returns a job description as {"title", "company", "paragraphs"}."""
+    rng = random.Random(f"jd-{seed}-{language}-{size}")
+    vocab = VOCABULARY[language]
+    _, _, paragraphs = SIZES[size]
+    role = rng.choice(vocab["roles"])
+    company = rng.choice(COMPANIES)
+    body = [vocab["jd_intro"].format(company=company, role=role, city=rng.choice(CITIES))]
+    for _ in range(paragraphs):
+        body.append(" ".join(rng.choice(vocab["jd_sentences"]).format(a=rng.choice(SKILLS), b=rng.choice(SKILLS))
+                             for _ in range(4)))
+    body.append(vocab["jd_benefits"])
+    return {"title": vocab["jd_title"].format(role=role), "company": company, "paragraphs": body}
+
+
+def job_description_text(jd):
+    return "\n".join([jd["title"], jd["company"]] + jd["paragraphs"])
+
+
+def job_description_html(jd):
+    """A job board page: navigation, cookie banner and footer around the posting."""
+    paragraphs = "\n".join(f"<p>{p}</p>" for p in jd["paragraphs"])
+    related = "\n".join(f'<li><a href="/jobs/{i}">Similar job {i}</a></li>' for i in range(20))
+    return f"""<!DOCTYPE html>
+<html><head><title>{jd['title']} - {jd['company']}</title>
+<script>window.dataLayer = window.dataLayer || [];</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body>
+<nav class="navbar"><a href="/">Home</a> <a href="/jobs">Jobs</a> <a href="/login">Sign in</a></nav>
+<div id="cookie-banner">We use cookies to improve your experience. <button>Accept</button></div>
+<main><h1>{jd['title']}</h1><h2>{jd['company']}</h2>
+{paragraphs}
+</main>
+<aside class="sidebar"><ul>{related}</ul></aside>
+<footer class="footer">© {jd['company']}. All rights reserved. Privacy | Terms of use</footer>
+</body></html>"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic resume/job description corpus.")
+    parser.add_argument("out", help="Output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=list(LANGUAGES))
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = []
+    for size in args.sizes:
+        for language in args.languages:
+            stem = f"{size}_{language}"
+            resume = generate_resume(args.seed, language, size)
+            jd = generate_job_description(args.seed, language, size)
+            outputs = {
+                f"resume_{stem}.docx": resume_docx(resume),
+                f"resume_{stem}.pdf": resume_pdf(resume),
+                f"jd_{stem}.html": job_description_html(jd).encode("utf-8"),
+                f"jd_{stem}.txt": job_description_text(jd).encode("utf-8"),
+            }
+            for name, data in outputs.items():
+                with open(os.path.join(args.out, name), "wb") as f:
+                    f.write(data)
+            manifest.append({"resume": f"resume_{stem}.pdf", "position_title": jd["title"],
+                             "job_description": os.path.abspath(os.path.join(args.out, f"jd_{stem}.txt"))})
+    with open(os.path.join(args.out, "manifest.jsonl"), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(job) + "\n" for job in manifest)
+    print(f"{len(manifest) * 4} files written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Bulk tailoring: one resume refined (and cover-lettered) for many job postings.
+
+Work that depends only on the resume is done once: text extraction, section
+parsing, personal details, language detection, and resume keywords (once per
+output language). Only the posting-specific work repeats:
+
+1. every job description URL is fetched concurrently (pooled, cached
+   session, see jd_fetcher.py),
+2. JD keywords are extracted in one extract_keywords_batch call per language,
+3. all refinements and cover letters are requested concurrently through one
+   LLMClient, so rate limits, retries and the response cache still apply,
+4. PDFs are rendered as each posting's responses arrive and packed into a zip.
+
+Usage:
+    python bulk.py resume.pdf postings.txt --out applications.zip
+
+A postings file has one posting per line, either "source | position title |
+company | recruiter" (everything after the source is optional) or a JSON
+object with the keys job_description, position_title, company and recruiter.
+The source is a URL or the job description text. Cover letters are written
+for postings that name a company.
+"""
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import logging
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from language import get_language_detector
+from metrics import get_metrics
+from pipeline import (
+    create_cover_letter_pdf,
+    create_modern_resume_pdf,
+    extract_keywords,
+    extract_keywords_batch,
+    extract_personal_details,
+    extract_text,
+    fetch_job_description,
+    generate_cover_letter_content_async,
+    parse_resume_sections,
+    refine_resume_gemini_async,
+)
+
+logger = logging.getLogger("resume_pipeline")
+
+DEFAULT_POSITION_TITLE = "Software Engineer"
+DEFAULT_RECRUITER = "Hiring Manager"
+
+
+# --- Postings ---
+
+def parse_posting(line, default_position_title=DEFAULT_POSITION_TITLE):
+    """Parses one postings line (JSON object or "source | title | company | recruiter"); None for blank lines.
+
+    Raises ValueError for invalid JSON or a posting without a job description.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        posting = json.loads(line)
+        if not isinstance(posting, dict):
+            raise ValueError("expected a JSON object")
+    else:
+        fields = [field.strip() for field in line.split("|")]
+        posting = dict(zip(("job_description", "position_title", "company", "recruiter"), fields))
+    posting = {key: value for key, value in posting.items() if value}
+    if not isinstance(posting.get("job_description"), str) or not posting["job_description"].strip():
+        raise ValueError("missing job_description (a URL or the job description text)")
+    posting.setdefault("position_title", default_position_title)
+    return posting
+
+
+def parse_postings(text, default_position_title=DEFAULT_POSITION_TITLE):
+    """Parses a postings file; a bad line raises ValueError naming its line number."""
+    postings = []
+    for number, line in enumerate(text.splitlines(), 1):
+        try:
+            posting = parse_posting(line, default_position_title)
+        except ValueError as e:
+            raise ValueError(f"postings line {number}: {e}") from e
+        if posting:
+            postings.append(posting)
+    return postings
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')[:40]
+
+
+def posting_id(index, posting):
+    """Stable, readable folder name inside the zip, e.g. "03-acme-backend-engineer"."""
+    label = _slug(" ".join(filter(None, (posting.get("company"), posting.get("position_title")))))
+    return f"{index + 1:02d}-{label}" if label else f"{index + 1:02d}"
+
+
+# --- Shared and per-posting analysis ---
+
+def prepare_resume(resume_text, sections=None, personal_info=None):
+    """Resume-side analysis shared by every posting; sections/personal_info may be passed in already parsed."""
+    language = get_language_detector().detect(resume_text)
+    return {
+        "text": resume_text,
+        "sections": sections if sections is not None else parse_resume_sections(resume_text, language),
+        "personal_info": personal_info if personal_info is not None else extract_personal_details(resume_text),
+        "language": language,
+        "keywords": {},  # output language -> resume keywords, filled on demand
+    }
+
+
+def fetch_postings(postings, max_workers=8):
+    """Fills posting["text"] for every posting, fetching distinct URLs concurrently."""
+    sources = list(dict.fromkeys(posting["job_description"] for posting in postings))
+
+    def fetch(source):
+        with get_metrics().span("fetch_job_description"):
+            return fetch_job_description(source)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        texts = dict(zip(sources, pool.map(fetch, sources)))
+    for posting in postings:
+        posting["text"] = texts[posting["job_description"]]
+    return postings
+
+
+def analyze_postings(resume, postings):
+    """Sets each posting's output language and keywords, batching keyword extraction per language.
+
+    The language rule matches choose_language: the resume's language when the
+    posting shares it, English otherwise.
+    """
+    detector = get_language_detector()
+    by_language = {}
+    for posting in postings:
+        if not posting["text"]:
+            continue
+        shared = detector.detect(posting["text"]) == resume["language"]
+        posting["language"] = resume["language"] if shared else "english"
+        by_language.setdefault(posting["language"], []).append(posting)
+
+    for language, group in by_language.items():
+        input_size = sum(len(posting["text"]) for posting in group)
+        with get_metrics().span("extract_keywords", input_bytes=input_size):
+            if language not in resume["keywords"]:
+                resume["keywords"][language] = extract_keywords(resume["text"], language=language)
+            batch = extract_keywords_batch([posting["text"] for posting in group], language=language)
+            for posting, keywords in zip(group, batch):
+                posting["keywords"] = keywords
+    return postings
+
+
+# --- Generation and rendering ---
+
+def _render(resume, posting, refined_sections, cover_letter, photo):
+    files = {}
+    if refined_sections:
+        with get_metrics().span("render_resume_pdf"):
+            files["resume.pdf"] = create_modern_resume_pdf(refined_sections, None, resume["personal_info"], photo)
+    if cover_letter:
+        company_info = {
+            "company": posting["company"],
+            "recruiter": posting.get("recruiter", DEFAULT_RECRUITER),
+            "company_city": posting.get("company_city", ""),
+            "date": datetime.date.today().strftime("%B %d, %Y"),
+        }
+        with get_metrics().span("render_cover_letter_pdf"):
+            files["cover_letter.pdf"] = create_cover_letter_pdf(
+                None, resume["personal_info"], company_info, posting["position_title"],
+                cover_letter, posting["language"])
+    return {name: data for name, data in files.items() if data}
+
+
+async def _nothing():
+    return None
+
+
+async def _timed(stage, awaitable):
+    """Awaits an LLM stage in a span; a None result (the stage logged its error) counts as a failure."""
+    with get_metrics().span(stage) as span:
+        result = await awaitable
+        span.failed = not result
+        return result
+
+
+async def _tailor_one(resume, posting, cover_letters, photo, response_cache, llm_client, per_section):
+    source = posting["job_description"]
+    if not source.lower().startswith("http"):
+        source = source.strip().split("\n", 1)[0][:80]  # pasted text: its first line identifies it
+    result = {"id": posting["id"], "source": source,
+              "position_title": posting["position_title"], "company": posting.get("company")}
+    if not posting["text"]:
+        return dict(result, status="failed", stage="fetch", error="no job description text"), {}
+    result["language"] = posting["language"]
+
+    keywords = resume["keywords"][posting["language"]]
+    refine = refine_resume_gemini_async(
+        resume["sections"], keywords, posting["keywords"], posting["language"], posting["position_title"],
+        response_cache=response_cache, llm_client=llm_client, per_section=per_section)
+    # The letter is written from the parsed resume rather than the refined
+    # one, so both requests can be in flight at once.
+    wants_letter = cover_letters and bool(posting.get("company"))
+    letter = _timed("cover_letter", generate_cover_letter_content_async(
+        posting["text"], resume["sections"], resume["personal_info"], posting["company"],
+        posting.get("recruiter", DEFAULT_RECRUITER), posting["position_title"], posting["language"],
+        response_cache=response_cache, llm_client=llm_client)) if wants_letter else _nothing()
+    refined_sections, cover_letter = await asyncio.gather(_timed("refine", refine), letter)
+
+    # Rendering is CPU work; a worker thread keeps this loop free for the other postings' responses.
+    files = await asyncio.get_running_loop().run_in_executor(
+        None, _render, resume, posting, refined_sections, cover_letter, photo)
+    result["files"] = sorted(files)
+    if "resume.pdf" not in files:
+        return dict(result, status="failed", stage="refine", error="refinement or rendering failed"), files
+    if wants_letter and "cover_letter.pdf" not in files:
+        return dict(result, status="partial", stage="cover_letter", error="cover letter failed"), files
+    return dict(result, status="ok"), files
+
+
+async def tailor_postings_async(resume, postings, cover_letters=True, photo=None, response_cache=None,
+                                llm_client=None, per_section=False):
+    """Generates and renders every (already fetched and analyzed) posting concurrently.
+
+    Returns (results, files) with one result dict per posting and
+    files = {posting id: {file name: PDF bytes}}.
+    """
+    outcomes = await asyncio.gather(*[
+        _tailor_one(resume, posting, cover_letters, photo, response_cache, llm_client, per_section)
+        for posting in postings
+    ])
+    return [result for result, _ in outcomes], {result["id"]: files for result, files in outcomes}
+
+
+def build_zip(results, files):
+    """Zips every posting's PDFs into its own folder, plus a results.json summary."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            for name, data in files.get(result["id"], {}).items():
+                archive.writestr(f"{result['id']}/{name}", data)
+        archive.writestr("results.json", json.dumps(results, ensure_ascii=False, indent=2))
+    return buffer.getvalue()
+
+
+def tailor_resume_to_postings(resume_text, postings, cover_letters=True, photo=None, sections=None,
+                              personal_info=None, response_cache=None, llm_client=None, per_section=False,
+                              fetch_workers=8):
+    """Runs the whole bulk flow for one resume and returns (zip bytes, results)."""
+    postings = [dict(posting, id=posting_id(index, posting)) for index, posting in enumerate(postings)]
+    resume = prepare_resume(resume_text, sections, personal_info)
+    fetch_postings(postings, fetch_workers)
+    analyze_postings(resume, postings)
+    results, files = asyncio.run(tailor_postings_async(
+        resume, postings, cover_letters, photo, response_cache, llm_client, per_section))
+    return build_zip(results, files), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tailor one resume to many job postings and zip the PDFs.")
+    parser.add_argument("resume", help="PDF or DOCX resume")
+    parser.add_argument("postings", help="Postings file: one URL, 'source | title | company | recruiter' "
+                                         "or JSON object per line")
+    parser.add_argument("--out", default="applications.zip", help="Zip file to write")
+    parser.add_argument("--position-title", default=DEFAULT_POSITION_TITLE,
+                        help="Position title for postings that do not give one")
+    parser.add_argument("--photo", default=None, help="Photo for the resume header")
+    parser.add_argument("--no-cover-letters", action="store_true", help="Only produce resumes")
+    parser.add_argument("--per-section", action="store_true", help="Refine each section in its own request")
+    parser.add_argument("--fetch-workers", type=int, default=8, help="Concurrent job description fetches")
+    parser.add_argument("--backend", choices=["gemini", "openai", "stub"],
+                        default=os.environ.get("LLM_BACKEND", "gemini"),
+                        help="LLM backend (defaults to $LLM_BACKEND or gemini; stub runs offline)")
+    parser.add_argument("--api-key", default=(os.environ.get("GEMINI_API_KEYS") or os.environ.get("GEMINI_API_KEY")
+                                              or os.environ.get("GOOGLE_API_KEY")),
+                        help="Gemini API key, or comma-separated keys to pool")
+    parser.add_argument("--rpm", type=float, default=60, help="Max LLM requests per minute")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Max concurrent LLM requests")
+    parser.add_argument("--response-cache", default=None, help="SQLite file for caching LLM responses")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    if args.backend == "gemini" and not args.api_key:
+        parser.error("a Gemini API key is required (--api-key, $GEMINI_API_KEY or $GEMINI_API_KEYS)")
+
+    with open(args.postings, encoding="utf-8") as f:
+        try:
+            postings = parse_postings(f.read(), args.position_title)
+        except ValueError as e:
+            parser.error(str(e))
+    if not postings:
+        parser.error(f"no postings in {args.postings}")
+    resume_text = extract_text(args.resume)
+    if not resume_text:
+        parser.error(f"no text could be extracted from {args.resume}")
+
+    from llm_cache import ResponseCache
+    from llm_client import LLMClient, make_backend
+    response_cache = ResponseCache(args.response_cache) if args.response_cache else None
+    llm_client = LLMClient(requests_per_minute=args.rpm, max_concurrency=args.llm_concurrency,
+                           backend=make_backend(args.backend, api_keys=args.api_key and args.api_key.split(",")))
+    archive, results = tailor_resume_to_postings(
+        resume_text, postings, cover_letters=not args.no_cover_letters, photo=args.photo,
+        response_cache=response_cache, llm_client=llm_client, per_section=args.per_section,
+        fetch_workers=args.fetch_workers)
+    with open(args.out, "wb") as f:
+        f.write(archive)
+
+    ok = sum(1 for result in results if result["status"] == "ok")
+    print(f"{ok}/{len(results)} postings tailored; PDFs written to {args.out}")
+    return 0 if ok == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
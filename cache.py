@@ -0,0 +1,124 @@
+"""Content-addressed cache for extracted resume text and parsed sections.
+
+Entries are keyed by the SHA-256 of the uploaded bytes plus the parser version,
+so a Streamlit rerun on the same upload skips extraction and parsing entirely,
+and bumping PARSER_VERSION in pipeline.py invalidates stale results.
+
+There are two layers: an in-memory LRU (always on) and an optional on-disk
+layer that survives restarts and is trimmed to a byte budget, oldest first.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def content_key(data, version):
+    """Returns the cache key for a blob of file bytes under a given parser version."""
+    return f"{hashlib.sha256(data).hexdigest()}-{version}"
+
+
+class DocumentCache:
+    """Two-level (memory LRU + optional disk) cache of JSON-serializable values per document."""
+
+    def __init__(self, max_entries=128, disk_dir=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, key, field):
+        """Returns the cached value or None."""
+        with self._lock:
+            if (key, field) in self._memory:
+                self._memory.move_to_end((key, field))
+                return self._memory[(key, field)]
+
+        value = self._read_disk(key, field)
+        if value is not None:
+            self._remember(key, field, value)
+        return value
+
+    def put(self, key, field, value):
+        self._remember(key, field, value)
+        self._write_disk(key, field, value)
+
+    def get_or_compute(self, key, field, compute):
+        """Returns the cached value, computing and storing it on a miss.
+
+        Empty results (e.g. an unreadable file) are returned but not cached.
+        """
+        value = self.get(key, field)
+        if value is None:
+            value = compute()
+            if value:
+                self.put(key, field, value)
+        return value
+
+    def _remember(self, key, field, value):
+        with self._lock:
+            self._memory[(key, field)] = value
+            self._memory.move_to_end((key, field))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # --- Disk layer ---
+
+    def _path(self, key, field):
+        return os.path.join(self.disk_dir, f"{key}.{field}.json")
+
+    def _disk_entries(self):
+        """Yields (path, size, mtime) for every cache file on disk."""
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def _read_disk(self, key, field):
+        if not self.disk_dir:
+            return None
+        path = self._path(key, field)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f, object_pairs_hook=OrderedDict)
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, field, value):
+        if not self.disk_dir:
+            return
+        path = self._path(key, field)
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += len(payload)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Deletes least-recently-used files until the disk layer is back under budget."""
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
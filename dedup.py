@@ -0,0 +1,390 @@
+"""Near-duplicate resume detection with MinHash signatures and LSH banding.
+
+A resume is reduced to word shingles of its parsed sections (or of its
+extracted text), so re-exports, reflowed layouts and small edits still share
+most shingles. Each resume gets a MinHash signature of num_perm 32-bit
+values. The fraction of positions where two signatures agree estimates the
+Jaccard similarity of their shingle sets. LSH splits signatures into bands and
+buckets resumes per band, so a lookup compares only against resumes sharing
+a bucket, not the whole corpus. Those candidates are then confirmed against
+`threshold`.
+
+Signatures persist either in SQLite (written through on every add) or in a
+compressed .npz file (written by save() and close()). The signature parameters
+(num_perm, shingle_size, seed) are stored with them and must match when an
+index is reopened. The threshold may change freely: buckets are rebuilt on load.
+
+Back-fill an existing corpus and list its duplicate clusters:
+    python dedup.py backfill resumes/ --index duplicates.db --threshold 0.85
+
+batch.py flags duplicates at ingest (--dedup-index). With --reuse-duplicates
+it also skips the LLM for a resume whose nearest duplicate was already refined
+for the same job description and position.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from resume_index import section_text
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = 0xFFFFFFFF
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5
+
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """Set of lowercase word `size`-grams (the whole text as one shingle when it is shorter)."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def canonical_text(sections):
+    """parse_resume_sections output as plain text, independent of the source layout."""
+    return "\n".join(f"{name}\n{section_text(content)}" for name, content in sections.items())
+
+
+def document_id(name, text=None, sections=None):
+    """Index id for one version of a document: its name qualified by a hash of its content.
+
+    Re-indexing the same file leaves one entry, while a resubmission under the
+    same name with different content gets its own entry and is matched against
+    the earlier one.
+    """
+    content = canonical_text(sections) if sections else (text or "")
+    return f"{name}@{hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]}"
+
+
+def lsh_params(threshold, num_perm):
+    """(bands, rows) whose S-curve midpoint (1/bands)^(1/rows) is the highest at or below threshold.
+
+    Erring low means pairs just under the threshold still become candidates
+    (fewer misses). The exact check against threshold then drops them.
+    """
+    best = (0.0, num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if best[0] < midpoint <= threshold:
+            best = (midpoint, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """Deterministic MinHash over num_perm universal hash functions (a * x + b) mod p."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        import numpy as np  # only needed once fingerprints are computed
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        # a < 2^31 and 32-bit shingle hashes keep a * x + b below 2^64: no overflow.
+        self._a = rng.randint(1, 1 << 31, num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        import numpy as np
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set))
+        values = (np.outer(hashes, self._a) + self._b) % np.uint64(MERSENNE_PRIME)
+        return (values & np.uint64(MAX_HASH)).min(axis=0).astype(np.uint32)
+
+
+@lru_cache(maxsize=8)
+def _hasher(num_perm, seed):
+    return MinHasher(num_perm, seed)
+
+
+def fingerprint(text=None, sections=None, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+    """MinHash signature of a resume from its parsed sections (preferred) or its extracted text."""
+    source = canonical_text(sections) if sections else (text or "")
+    return _hasher(num_perm, seed).signature(shingles(source, shingle_size))
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures."""
+    return float((signature == other).mean())
+
+
+def refinement_key(job_description, position_title, language, model_name):
+    """Identifies the refinement context a cached result is valid for."""
+    payload = json.dumps([" ".join(job_description.split()), position_title, language, model_name],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of resume signatures with per-resume metadata. Thread-safe.
+
+    storage is "sqlite" or "npz" (default: by the path's extension). With
+    path=None the index lives in memory only.
+    """
+
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=1, storage=None):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.storage = storage or ("npz" if path and path.endswith(".npz") else "sqlite")
+        if self.storage not in ("sqlite", "npz"):
+            raise ValueError(f"unknown storage '{self.storage}' (expected sqlite or npz)")
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._signatures = {}
+        self._metadata = {}
+        self._buckets = [defaultdict(set) for _ in range(self.bands)]
+        self._lock = threading.RLock()
+        self._conn = None
+        self._dirty = False
+        if path:
+            self._open()
+
+    # --- Persistence ---
+
+    def _params(self):
+        return {"num_perm": self.num_perm, "shingle_size": self.shingle_size, "seed": self.seed}
+
+    def _check_params(self, stored):
+        if stored and stored != self._params():
+            raise ValueError(f"{self.path} was built with {stored}, not {self._params()}")
+
+    def _open(self):
+        if self.storage == "npz":
+            if os.path.exists(self.path):
+                import numpy as np
+                with np.load(self.path, allow_pickle=False) as data:
+                    self._check_params(json.loads(str(data["params"])))
+                    for doc_id, signature, metadata in zip(data["ids"], data["signatures"], data["metadata"]):
+                        self._insert(str(doc_id), signature, json.loads(str(metadata)))
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS params (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                " id TEXT PRIMARY KEY,"
+                " signature BLOB NOT NULL,"
+                " metadata TEXT NOT NULL)"
+            )
+            stored = dict(self._conn.execute("SELECT key, value FROM params").fetchall())
+            self._check_params({key: json.loads(value) for key, value in stored.items()})
+            self._conn.executemany("INSERT OR IGNORE INTO params (key, value) VALUES (?, ?)",
+                                   [(key, json.dumps(value)) for key, value in self._params().items()])
+        import numpy as np
+        for doc_id, blob, metadata in self._conn.execute("SELECT id, signature, metadata FROM signatures"):
+            self._insert(doc_id, np.frombuffer(blob, dtype=np.uint32), json.loads(metadata))
+
+    def _persist(self, doc_id):
+        if self._conn is not None:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO signatures (id, signature, metadata) VALUES (?, ?, ?)",
+                    (doc_id, self._signatures[doc_id].tobytes(),
+                     json.dumps(self._metadata[doc_id], ensure_ascii=False)))
+        else:
+            self._dirty = True
+
+    def save(self):
+        """Writes an npz index atomically (SQLite indexes are already up to date)."""
+        with self._lock:
+            if self.storage != "npz" or not self.path or not self._dirty:
+                return
+            import numpy as np
+            ids = list(self._signatures)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    params=np.array(json.dumps(self._params())),
+                    ids=np.array(ids, dtype=str),
+                    signatures=np.array([self._signatures[i] for i in ids], dtype=np.uint32).reshape(-1, self.num_perm),
+                    metadata=np.array([json.dumps(self._metadata[i], ensure_ascii=False) for i in ids], dtype=str),
+                )
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def close(self):
+        self.save()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- LSH ---
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _insert(self, doc_id, signature, metadata):
+        if doc_id in self._signatures:
+            for bucket, key in zip(self._buckets, self._band_keys(self._signatures[doc_id])):
+                bucket[key].discard(doc_id)
+        self._signatures[doc_id] = signature
+        self._metadata[doc_id] = metadata
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket[key].add(doc_id)
+
+    def fingerprint(self, text=None, sections=None):
+        return fingerprint(text, sections, self.num_perm, self.shingle_size, self.seed)
+
+    def query(self, signature, exclude=None):
+        """[(doc id, estimated similarity)] at or above threshold, most similar first."""
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(key, ()))
+            candidates.discard(exclude)
+            matches = [(doc_id, similarity(signature, self._signatures[doc_id])) for doc_id in candidates]
+        return sorted((m for m in matches if m[1] >= self.threshold), key=lambda m: m[1], reverse=True)
+
+    def add(self, doc_id, signature, metadata=None):
+        """Adds or replaces a signature; existing metadata is kept unless new metadata is given."""
+        with self._lock:
+            if metadata is None:
+                metadata = self._metadata.get(doc_id, {})
+            self._insert(doc_id, signature, metadata)
+            self._persist(doc_id)
+
+    def _reingested(self, doc_id, signature):
+        """doc_id when it is already indexed with this exact signature (a re-ingest, not a duplicate)."""
+        import numpy as np
+        with self._lock:
+            stored = self._signatures.get(doc_id)
+            return doc_id if stored is not None and np.array_equal(stored, signature) else None
+
+    def ingest(self, doc_id, text=None, sections=None, metadata=None):
+        """Fingerprints and adds one resume; returns its near-duplicates already in the index.
+
+        doc_id should be unique per document version (see document_id). An
+        earlier entry under the same id with different content is reported as a
+        match and then replaced; only an identical re-ingest is not.
+        """
+        signature = self.fingerprint(text, sections)
+        matches = self.query(signature, exclude=self._reingested(doc_id, signature))
+        self.add(doc_id, signature, metadata)
+        return matches
+
+    def backfill(self, documents, workers=None):
+        """Adds many (doc id, text, sections) documents; returns {doc id: matches} for those with duplicates.
+
+        Fingerprints are computed in a process pool when workers > 1. Each
+        document is compared with everything indexed before it, so a cluster is
+        reported once, under its later members. Ids follow ingest()'s rules.
+        """
+        documents = list(documents)
+        args = [(text, sections, self.num_perm, self.shingle_size, self.seed) for _, text, sections in documents]
+        if workers and workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                signatures = list(pool.map(_fingerprint_args, args, chunksize=16))
+        else:
+            signatures = [_fingerprint_args(a) for a in args]
+
+        duplicates = {}
+        for (doc_id, _, _), signature in zip(documents, signatures):
+            matches = self.query(signature, exclude=self._reingested(doc_id, signature))
+            if matches:
+                duplicates[doc_id] = matches
+            self.add(doc_id, signature)
+        return duplicates
+
+    # --- Metadata and refinement reuse ---
+
+    def metadata(self, doc_id):
+        with self._lock:
+            return self._metadata.get(doc_id, {})
+
+    def record_refinement(self, doc_id, context_key, refined_sections):
+        """Stores a resume's refinement for one context (see refinement_key) for its future duplicates."""
+        with self._lock:
+            if doc_id not in self._signatures:
+                return
+            self._metadata[doc_id].setdefault("refinements", {})[context_key] = refined_sections
+            self._persist(doc_id)
+
+    def reuse_refinement(self, matches, context_key):
+        """(doc id, refined sections) of the most similar match refined in this context, or (None, None)."""
+        with self._lock:
+            for doc_id, _ in matches:
+                refined = self._metadata.get(doc_id, {}).get("refinements", {}).get(context_key)
+                if refined:
+                    return doc_id, refined
+        return None, None
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def stats(self):
+        with self._lock:
+            return {"resumes": len(self._signatures), "threshold": self.threshold,
+                    "bands": self.bands, "rows": self.rows, "storage": self.storage}
+
+
+def _fingerprint_args(args):
+    return fingerprint(*args)
+
+
+def _load_resume(path):
+    """Process-pool worker: (doc id, text, sections) for one resume file."""
+    from pipeline import detect_language, extract_text, parse_resume_sections
+    text = extract_text(path, parallel=False)
+    sections = parse_resume_sections(text, detect_language(text)) if text else None
+    return document_id(os.path.basename(path), text, sections), text, sections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find near-duplicate resumes with MinHash/LSH.")
+    parser.add_argument("--index", default=os.environ.get("DEDUP_INDEX_PATH", "duplicates.db"),
+                        help="Index file: .db (SQLite) or .npz (defaults to $DEDUP_INDEX_PATH or duplicates.db)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Estimated Jaccard similarity at which resumes count as duplicates")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="Index a directory of PDF/DOCX resumes")
+    backfill.add_argument("source")
+    backfill.add_argument("--workers", type=int, default=None, help="Process pool size")
+    check = commands.add_parser("check", help="List indexed near-duplicates of one resume without adding it")
+    check.add_argument("resume")
+    args = parser.parse_args(argv)
+
+    index = NearDuplicateIndex(args.index, threshold=args.threshold)
+    if args.command == "backfill":
+        from concurrent.futures import ProcessPoolExecutor
+
+        from batch import RESUME_EXTENSIONS
+        paths = [os.path.join(args.source, entry) for entry in sorted(os.listdir(args.source))
+                 if entry.lower().endswith(RESUME_EXTENSIONS)]
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            documents = [doc for doc in pool.map(_load_resume, paths) if doc[1]]
+        duplicates = index.backfill(documents)
+        for doc_id, matches in duplicates.items():
+            print(f"{doc_id}: " + ", ".join(f"{match} ({score:.2f})" for match, score in matches))
+        print(f"{len(documents)} resumes indexed, {len(duplicates)} near-duplicates; {index.stats()}")
+    else:
+        _, text, sections = _load_resume(args.resume)
+        for doc_id, score in index.query(index.fingerprint(text, sections)):
+            print(f"{doc_id} ({score:.2f})")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Heading and entry classifiers for parse_resume_sections, built once at import.
+
+All known headings are compiled into a single alternation regex, so checking
+a line costs one regex scan instead of one pattern per heading. The heading
+dictionary is extensible: register_headings() adds phrases mapped to the
+canonical section names used by the rest of the pipeline ("Experience",
+"Skills", "Education", "Professional Summary", ...).
+
+Headings of other languages only apply to resumes detected in that language
+(headings_for): French words such as "prix" or "formation" also occur on
+English lines like "grand prix" or "team formation lead".
+"""
+import re
+
+# (phrase, canonical section) in priority order: when a line mentions several
+# headings, the one listed first wins.
+ENGLISH_HEADINGS = [
+    ("professional summary", "Professional Summary"), ("summary", "Summary"),
+    ("objective", "Professional Summary"), ("about me", "Professional Summary"),
+    ("profile", "Professional Summary"),
+    ("experience", "Experience"), ("work experience", "Experience"),
+    ("professional experience", "Experience"), ("employment", "Employment"),
+    ("projects", "Projects"), ("portfolio", "Portfolio"),
+    ("education", "Education"), ("academic background", "Education"),
+    ("skills", "Skills"), ("technical skills", "Skills"), ("core competencies", "Skills"),
+    ("expertise", "Skills"), ("competencies", "Skills"),
+    ("certifications", "Certifications"), ("awards", "Awards"), ("achievements", "Achievements"),
+    ("publications", "Publications"), ("volunteer", "Volunteer"), ("volunteering", "Volunteering"),
+    ("languages", "Languages"), ("hobbies", "Hobbies"), ("interests", "Interests"),
+    ("references", "References"),
+    ("contact", "Contact"),
+]
+
+FRENCH_HEADINGS = [
+    ("résumé professionnel", "Professional Summary"), ("profil professionnel", "Professional Summary"),
+    ("profil", "Professional Summary"), ("à propos de moi", "Professional Summary"),
+    ("expérience professionnelle", "Experience"), ("expériences professionnelles", "Experience"),
+    ("expérience", "Experience"), ("expériences", "Experience"), ("parcours professionnel", "Experience"),
+    ("projets", "Projects"), ("projets personnels", "Projects"),
+    ("formation", "Education"), ("formations", "Education"), ("études", "Education"),
+    ("diplômes", "Education"),
+    ("compétences", "Skills"), ("compétences techniques", "Skills"), ("savoir-faire", "Skills"),
+    ("certificats", "Certifications"), ("prix", "Awards"), ("réalisations", "Achievements"),
+    ("bénévolat", "Volunteering"), ("langues", "Languages"), ("loisirs", "Hobbies"),
+    ("centres d'intérêt", "Interests"), ("centres d’intérêt", "Interests"), ("références", "References"),
+    ("coordonnées", "Contact"),
+]
+
+
+class HeadingClassifier:
+    """Maps a resume line to a canonical section name using one compiled alternation."""
+
+    def __init__(self, headings=()):
+        self._priority = {}
+        self._canonical = {}
+        self._pattern = None
+        self.register(headings)
+
+    def register(self, headings):
+        """Adds (phrase, canonical) pairs after the existing ones and recompiles the matcher."""
+        for phrase, canonical in headings:
+            phrase = phrase.lower()
+            if phrase not in self._priority:
+                self._priority[phrase] = len(self._priority)
+                self._canonical[phrase] = canonical
+        # Longest first, so a long phrase is not shadowed by a shorter one sharing its start.
+        alternation = "|".join(re.escape(p) for p in sorted(self._priority, key=len, reverse=True))
+        self._pattern = re.compile(r'\b(?:' + alternation + r')\b') if alternation else None
+
+    def headings(self):
+        """The registered (phrase, canonical) pairs in priority order."""
+        return [(phrase, self._canonical[phrase]) for phrase in sorted(self._priority, key=self._priority.get)]
+
+    def classify(self, potential_heading_lower):
+        """Returns the canonical section for a lowercased line (colons removed), or None.
+
+        A line of fewer than five words is a heading if it mentions a known
+        phrase as whole words; longer lines only if they are exactly a phrase.
+        """
+        if potential_heading_lower in self._canonical:
+            if len(potential_heading_lower.split()) >= 5:
+                return self._canonical[potential_heading_lower]
+        elif len(potential_heading_lower.split()) >= 5:
+            return None
+        if self._pattern is None:
+            return None
+
+        best = None
+        for match in self._pattern.finditer(potential_heading_lower):
+            phrase = match.group(0)
+            if best is None or self._priority[phrase] < self._priority[best]:
+                best = phrase
+        return self._canonical[best] if best else None
+
+
+HEADINGS = HeadingClassifier(ENGLISH_HEADINGS)
+# Per-language classifiers: the English headings followed by the language's own
+# (resumes often mix in English headings such as "Skills").
+_LANGUAGE_HEADINGS = {"french": HeadingClassifier(ENGLISH_HEADINGS + FRENCH_HEADINGS)}
+
+
+def headings_for(language):
+    """The classifier for resumes in `language` (as named by language.py); English headings only by default."""
+    return _LANGUAGE_HEADINGS.get(language, HEADINGS)
+
+
+def register_headings(headings, language=None):
+    """Extends the heading dictionary for every resume, or only for resumes in `language`."""
+    if language is None:
+        HEADINGS.register(headings)
+        for classifier in _LANGUAGE_HEADINGS.values():
+            classifier.register(headings)
+    elif language in _LANGUAGE_HEADINGS:
+        _LANGUAGE_HEADINGS[language].register(headings)
+    else:
+        _LANGUAGE_HEADINGS[language] = HeadingClassifier(HEADINGS.headings() + list(headings))
+
+
+# --- Experience/Projects entry classification ---
+
+# A line starting an entry: "Company – Role | Mon YYYY - Present", "Senior Engineer",
+# "<b>Journal App</b>", or any capitalized line.
+ENTRY_TITLE = re.compile(
+    r'[A-Z][a-zA-Z\s,]+\s*–\s*[A-Z][a-zA-Z\s,]+\s*\|\s*\w{3}\s*\d{4}\s*-\s*(?:\w{3}\s*\d{4}|Present)'
+    r'|[A-Z][a-zA-Z\s]+\s*(?:Engineer|Developer|Manager|Analyst|Specialist)'
+    r'|(?:<b>)?[A-Za-z][a-zA-Z\s]+(?:App|Platform|System|Tool)(?:</b>)?'
+    r'|[A-Z][a-zA-Z\s]+(?:\s*\d{4})?'
+)
+ACTION_VERB = re.compile(
+    r'(?:designed|developed|led|implemented|managed|built|optimized|achieved|spearheaded|improved|diagnosed)',
+    re.IGNORECASE
+)
+QUANTIFIED = re.compile(r'\d+%|\$\d+|[xX]\d+')
+
+
+def is_entry_title(line):
+    """True if a (stripped) line looks like the title of an Experience/Projects entry."""
+    return bool(ENTRY_TITLE.match(line)) and len(line.split()) < 15  # Prevent very long lines from being titles
+
+
+def is_likely_bullet(line):
+    """True if a (stripped) line reads like an accomplishment bullet."""
+    return bool(ACTION_VERB.match(line) or QUANTIFIED.search(line))
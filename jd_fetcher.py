@@ -0,0 +1,225 @@
+"""Job description fetcher with connection pooling, HTTP caching and main-content extraction.
+
+One pooled requests.Session is reused for every fetch. Responses are cached
+per URL (in memory, and on disk when a cache directory is given) together with
+the extracted text, so a URL fetched within `fresh_for` seconds is served
+without any request. After that it is revalidated with a conditional GET
+(If-None-Match / If-Modified-Since), and a 304 reuses the stored text without
+re-parsing.
+
+Extraction prefers schema.org JobPosting data, then <main>/<article>, then the
+block whose paragraphs carry the most non-link text, after dropping
+navigation, footers and cookie banners.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+try:
+    import lxml  # noqa: F401  (optional, much faster than html.parser)
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form",
+              "nav", "header", "footer", "aside", "button"]
+# Whole words of class/id/role values ("cookie-banner", "related_jobs", "nav"), never
+# substrings: "job-header" or "shared-layout" may hold the posting itself.
+# Header, footer and nav elements are already removed as NOISE_TAGS.
+NOISE_ATTR = re.compile(
+    r'(?:^|[\s_-])(?:cookies?|consent|gdpr|nav|navbar|navigation|menu|breadcrumbs?|footer|social|sharing|'
+    r'newsletter|subscribe|modal|popup|sidebar|related|similar|recommended|recommendations)(?=$|[\s_-])',
+    re.IGNORECASE
+)
+USER_AGENT = "Mozilla/5.0 (compatible; ResumeParser/1.0; +https://github.com/adisharma132001/Resume_Parser)"
+
+
+def _job_posting_text(soup):
+    """Returns the description from schema.org JobPosting JSON-LD, if the page has one."""
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        candidates = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for item in candidates:
+            if isinstance(item, dict) and item.get("@type") == "JobPosting" and item.get("description"):
+                title = item.get("title", "")
+                description = BeautifulSoup(item["description"], DEFAULT_PARSER).get_text(separator=' ', strip=True)
+                return f"{title}\n{description}".strip()
+    return ""
+
+
+def _link_density(tag, text_length):
+    """Share of a tag's text that sits inside links (menus and "related jobs" lists are mostly links)."""
+    link_length = sum(len(a.get_text(" ", strip=True)) for a in tag.find_all("a"))
+    return min(1.0, link_length / text_length) if text_length else 1.0
+
+
+def _densest_block(soup, min_paragraph=25):
+    """The div/section whose own paragraphs hold the most non-link text, or None.
+
+    Each paragraph credits its nearest div/section in full and the one above it
+    by half, so a page-wide wrapper does not win merely by containing
+    everything. Candidates are then scaled by (1 - link density).
+    """
+    scores, blocks = {}, {}
+    for paragraph in soup.find_all(["p", "li", "pre"]):
+        text_length = len(paragraph.get_text(" ", strip=True))
+        if text_length < min_paragraph:
+            continue
+        value = text_length * (1 - _link_density(paragraph, text_length))
+        block = paragraph.find_parent(["div", "section"])
+        for share in (1.0, 0.5):
+            if block is None:
+                break
+            scores[id(block)] = scores.get(id(block), 0.0) + value * share
+            blocks[id(block)] = block
+            block = block.find_parent(["div", "section"])
+
+    def score(key):
+        text_length = len(blocks[key].get_text(" ", strip=True))
+        return scores[key] * (1 - _link_density(blocks[key], text_length))
+
+    return blocks[max(scores, key=score)] if scores else None
+
+
+def extract_main_content(html, parser=DEFAULT_PARSER):
+    """Extracts the readable job description text from an HTML page."""
+    soup = BeautifulSoup(html, parser)
+
+    posting = _job_posting_text(soup)
+    if posting:
+        return posting
+
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.decomposed:  # inside a block already removed
+            continue
+        attrs = " ".join(tag.get("class", []) or []) + " " + (tag.get("id") or "") + " " + (tag.get("role") or "")
+        if attrs.strip() and NOISE_ATTR.search(attrs) and tag.name not in ("body", "html", "main", "article"):
+            tag.decompose()
+
+    root = soup.find("main") or soup.find("article") or soup.find(attrs={"role": "main"})
+    if root is None:
+        root = _densest_block(soup) or soup.body or soup
+    return root.get_text(separator=' ', strip=True)
+
+
+class JobDescriptionFetcher:
+    """Pooled, HTTP-caching fetcher returning extracted job description text.
+
+    The in-memory layer keeps the max_entries most recently used URLs; the
+    disk layer (cache_dir) is unbounded.
+    """
+
+    def __init__(self, cache_dir=None, fresh_for=300, timeout=10, parser=DEFAULT_PARSER, pool_size=10,
+                 max_entries=256):
+        self.cache_dir = cache_dir
+        self.fresh_for = fresh_for
+        self.timeout = timeout
+        self.parser = parser
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(self, url):
+        """Returns the extracted text for url. Raises requests.RequestException on failure."""
+        entry = self._load(url)
+        if entry and time.time() - entry["checked_at"] < self.fresh_for:
+            return entry["text"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = self.session.get(url, headers=headers, timeout=self.timeout)
+        if resp.status_code == 304 and entry:
+            entry["checked_at"] = time.time()
+            self._store(url, entry)
+            return entry["text"]
+        resp.raise_for_status()
+
+        entry = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "checked_at": time.time(),
+            "text": extract_main_content(resp.text, self.parser),
+        }
+        self._store(url, entry)
+        return entry["text"]
+
+    # --- Cache ---
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, url):
+        with self._lock:
+            if url in self._memory:
+                self._memory.move_to_end(url)
+                return dict(self._memory[url])
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(url, entry)
+        return dict(entry)
+
+    def _remember(self, url, entry):
+        with self._lock:
+            self._memory[url] = entry
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, url, entry):
+        self._remember(url, entry)
+        if not self.cache_dir:
+            return
+        tmp_path = f"{self._path(url)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(url))
+        except OSError:
+            pass
+
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Process-wide fetcher; JD_CACHE_DIR enables the on-disk cache, JD_CACHE_MAX_ENTRIES bounds the memory one."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = JobDescriptionFetcher(
+                cache_dir=os.environ.get("JD_CACHE_DIR") or None,
+                max_entries=int(os.environ.get("JD_CACHE_MAX_ENTRIES", "256")),
+            )
+        return _default_fetcher
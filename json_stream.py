@@ -0,0 +1,91 @@
+"""Incremental parser for a streamed top-level JSON object.
+
+Gemini returns the refined resume as one JSON object whose keys are section
+names. Feeding the streamed chunks into TopLevelObjectParser yields each
+(section, value) pair as soon as its value is complete, instead of waiting for
+the whole response. Text before the first "{" (e.g. a ```json fence) is skipped.
+"""
+import json
+
+
+class TopLevelObjectParser:
+    """Emits (key, value) pairs of the outermost JSON object as their values complete."""
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "key"  # key -> colon -> value -> in_value -> after_value -> key ...
+        self._key = None
+        self._token_start = None
+
+    def feed(self, chunk):
+        """Adds a chunk of text and returns the list of (key, value) pairs completed by it."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key":
+                        self._key = json.loads(text[self._token_start:i + 1])
+                        self._expect = "colon"
+                    elif self._depth == 1 and self._expect == "in_value":
+                        completed.append(self._emit(text, i + 1))
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect in ("key", "value"):
+                    self._token_start = i
+                    if self._expect == "value":
+                        self._expect = "in_value"
+            elif ch in '{[':
+                if self._depth == 1 and self._expect == "value":
+                    self._token_start = i
+                    self._expect = "in_value"
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "in_value":
+                    completed.append(self._emit(text, i + 1))
+                elif self._depth == 0:
+                    if self._expect == "in_value":  # trailing number/literal
+                        completed.append(self._emit(text, i))
+                    self.done = True
+            elif self._depth == 1:
+                if ch == ':' and self._expect == "colon":
+                    self._expect = "value"
+                elif ch == ',':
+                    if self._expect == "in_value":
+                        completed.append(self._emit(text, i))
+                    self._expect = "key"
+                elif self._expect == "value" and not ch.isspace():
+                    self._token_start = i
+                    self._expect = "in_value"
+            i += 1
+        self._pos = i
+        return completed
+
+    def _emit(self, text, end):
+        self._expect = "after_value"
+        return self._key, json.loads(text[self._token_start:end].strip())
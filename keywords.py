@@ -0,0 +1,155 @@
+"""Keyword extraction engine: cached stopwords, n-grams, TF-IDF and batch scoring.
+
+Stopword sets are loaded once per language. Counting uses collections.Counter
+over a single tokenization pass, and n-grams ("machine learning") are built from
+the same token stream. With a document-frequency table built from past job
+descriptions, terms are ranked by TF-IDF so that distinctive skills outrank
+generic resume filler.
+
+Build a DF table from a folder of .txt/.html job descriptions:
+    python keywords.py jds/ --out keyword_df.json
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+_TOKEN = re.compile(r'\b\w+\b')
+
+
+@lru_cache(maxsize=None)
+def stopword_set(language):
+    """Stopwords for an NLTK language name, loaded (and downloaded if missing) once per process."""
+    import nltk  # slow to import; only needed once keywords are extracted
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+
+class KeywordEngine:
+    """Tokenizes, counts and ranks keywords; optionally holds a document-frequency table for TF-IDF."""
+
+    def __init__(self, df_path=None, min_length=3):
+        self.min_length = min_length
+        self.documents = 0
+        self.df = Counter()
+        self.df_path = df_path
+        if df_path and os.path.exists(df_path):
+            self.load(df_path)
+
+    # --- Counting ---
+
+    def terms(self, text, language='english', ngram_range=(1, 1), keep_short=frozenset()):
+        """Returns a Counter of unigrams and n-grams, skipping stopwords and short tokens.
+
+        An n-gram may contain no stopword or short token, so "machine learning"
+        counts but "experience with" does not. Tokens in keep_short (e.g. "go")
+        are kept despite min_length.
+        """
+        stop_words = stopword_set(language)
+        tokens = _TOKEN.findall(text.lower())
+        keep = [(len(token) >= self.min_length or token in keep_short) and token not in stop_words
+                for token in tokens]
+        min_n, max_n = ngram_range
+        counts = Counter()
+        if min_n <= 1:
+            counts.update(token for token, ok in zip(tokens, keep) if ok)
+        for n in range(max(2, min_n), max_n + 1):
+            counts.update(
+                " ".join(tokens[i:i + n])
+                for i in range(len(tokens) - n + 1)
+                if all(keep[i:i + n])
+            )
+        return counts
+
+    # --- Ranking ---
+
+    def idf(self, term):
+        return math.log((1 + self.documents) / (1 + self.df.get(term, 0))) + 1
+
+    def score(self, counts, scoring="frequency"):
+        """Returns {term: score} for a Counter from terms()."""
+        if scoring == "tfidf" and self.documents:
+            total = sum(counts.values()) or 1
+            return {term: (count / total) * self.idf(term) for term, count in counts.items()}
+        if scoring not in ("frequency", "tfidf"):
+            raise ValueError(f"unknown scoring '{scoring}'")
+        return counts
+
+    def top_keywords(self, text, top_n=15, language='english', ngram_range=(1, 1), scoring="frequency"):
+        """Top-N terms of one document, ties broken by first occurrence."""
+        scores = self.score(self.terms(text, language, ngram_range), scoring)
+        return sorted(scores, key=scores.get, reverse=True)[:top_n]
+
+    def score_batch(self, texts, top_n=15, language='english', ngram_range=(1, 1), scoring="frequency"):
+        """Top-N terms for many documents in one call (one list per input text)."""
+        return [self.top_keywords(text, top_n, language, ngram_range, scoring) for text in texts]
+
+    # --- Document frequencies ---
+
+    def add_documents(self, texts, language='english', ngram_range=(1, 2)):
+        """Adds documents to the DF table (each term counted once per document)."""
+        for text in texts:
+            self.df.update(self.terms(text, language, ngram_range).keys())
+            self.documents += 1
+
+    def save(self, path=None):
+        path = path or self.df_path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"documents": self.documents, "df": self.df}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.documents = data["documents"]
+        self.df = Counter(data["df"])
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_keyword_engine():
+    """Process-wide engine; KEYWORD_DF_PATH points it at a persisted DF table."""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = KeywordEngine(df_path=os.environ.get("KEYWORD_DF_PATH") or None)
+        return _default_engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a keyword document-frequency table from job descriptions.")
+    parser.add_argument("source", help="Directory of .txt/.html job descriptions")
+    parser.add_argument("--out", default="keyword_df.json")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--max-ngram", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    from jd_fetcher import extract_main_content
+
+    engine = KeywordEngine(df_path=args.out)
+    texts = []
+    for entry in sorted(os.listdir(args.source)):
+        path = os.path.join(args.source, entry)
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+        texts.append(extract_main_content(content) if entry.lower().endswith((".html", ".htm")) else content)
+    engine.add_documents(texts, args.language, (1, args.max_ngram))
+    engine.save(args.out)
+    print(f"{engine.documents} documents, {len(engine.df)} terms written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
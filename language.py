@@ -0,0 +1,112 @@
+"""Deterministic, sampled and memoized language detection.
+
+langdetect draws random n-grams, so unseeded runs can classify the same text
+differently, and its cost grows with the input length. LanguageDetector uses
+its own seeded DetectorFactory, classifies a bounded sample spread over the
+text (resumes open with names and contact details that say little about the
+language), and memoizes the per-language probabilities by content hash.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+from langdetect.lang_detect_exception import LangDetectException
+
+# langdetect codes the pipeline can work in, mapped to NLTK language names.
+LANGUAGE_NAMES = {"en": "english", "fr": "french"}
+DEFAULT_SAMPLE_CHARS = int(os.environ.get("LANGDETECT_SAMPLE_CHARS", "2000"))
+
+
+def sample_text(text, max_chars, windows=4):
+    """Returns at most max_chars of text, taken from evenly spaced windows cut at whitespace."""
+    if len(text) <= max_chars:
+        return text
+    size = max_chars // windows
+    step = (len(text) - size) // (windows - 1)
+    parts = []
+    for i in range(windows):
+        start = i * step
+        end = start + size
+        # Widen to whole words so no window starts or ends mid-token.
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+        parts.append(text[start:end])
+    return "\n".join(parts)
+
+
+class LanguageDetector:
+    """Seeded langdetect wrapper returning stable per-language probabilities."""
+
+    def __init__(self, seed=0, sample_chars=DEFAULT_SAMPLE_CHARS, max_entries=1024):
+        self.seed = seed
+        self.sample_chars = sample_chars
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._factory = None
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_factory(self):
+        # Profiles take a moment to load, so only do it on first use.
+        with self._lock:
+            if self._factory is None:
+                factory = DetectorFactory()
+                factory.load_profile(PROFILES_DIRECTORY)
+                factory.set_seed(self.seed)
+                self._factory = factory
+            return self._factory
+
+    def probabilities(self, text):
+        """Returns {language code: probability}, most likely first; empty if nothing can be detected."""
+        text = (text or "").strip()
+        if not text:
+            return {}
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return dict(self._memo[key])
+            self.misses += 1
+
+        detector = self._get_factory().create()
+        detector.append(sample_text(text, self.sample_chars))
+        try:
+            probs = {lang.lang: lang.prob for lang in detector.get_probabilities()}
+        except LangDetectException:  # no usable features, e.g. only digits or symbols
+            probs = {}
+
+        with self._lock:
+            self._memo[key] = probs
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return dict(probs)
+
+    def detect(self, text, default="english"):
+        """Returns the NLTK name of the most likely supported language, or default."""
+        probs = self.probabilities(text)
+        if not probs:
+            return default
+        return LANGUAGE_NAMES.get(next(iter(probs)), default)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._memo)}
+
+
+_default_detector = None
+_default_detector_lock = threading.Lock()
+
+
+def get_language_detector():
+    """Process-wide detector, so the profiles and memo are shared by all callers."""
+    global _default_detector
+    with _default_detector_lock:
+        if _default_detector is None:
+            _default_detector = LanguageDetector()
+        return _default_detector
@@ -0,0 +1,454 @@
+"""LLM provider backends used by LLMClient.
+
+A backend performs one request (generate) or one streamed request (stream)
+and says which of its errors are worth retrying. Rate limiting, retries and
+deadlines stay in LLMClient, so every backend gets them for free:
+
+- GeminiBackend: google-generativeai (the default).
+- OpenAIBackend: the openai package's chat completions API (OPENAI_API_KEY).
+- StubBackend: offline and deterministic. It answers every pipeline prompt
+  with schema-valid JSON built from the prompt's own input, after a
+  configurable latency, and can inject errors. Use it for load tests,
+  end-to-end benchmarks and capacity planning without spending quota.
+
+Select one with LLM_BACKEND=gemini|openai|stub (LLM_MODEL overrides the
+model). The stub is tuned with LLM_STUB_LATENCY, LLM_STUB_JITTER and
+LLM_STUB_ERROR_RATE.
+
+GeminiBackend never touches genai.configure(): every request uses a client
+built for its own API key, either the caller's (api_key=...) or one leased
+from a KeyPool (GEMINI_API_KEYS), so concurrent sessions cannot use each
+other's keys.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from google.api_core import exceptions as api_exceptions
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+OPENAI_MODEL_NAME = "gpt-4o-mini"
+
+
+def is_retryable(error):
+    """True for rate-limit (429) and transient server (5xx) errors, and for attempt timeouts."""
+    if isinstance(error, api_exceptions.MethodNotImplemented):
+        return False
+    return isinstance(error, (api_exceptions.TooManyRequests, api_exceptions.ServerError, asyncio.TimeoutError))
+
+
+class _KeyState:
+    def __init__(self, key):
+        self.key = key
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.cooldown_until = 0.0
+        self.recent = deque()  # start times of requests in the last minute
+
+
+class KeyPool:
+    """API keys shared by one deployment, with per-key quota accounting.
+
+    acquire() leases a key that is neither cooling down nor at its
+    requests_per_minute quota: the one with the fewest requests in flight
+    (least_loaded) or the next one in turn (round_robin). A key answered with
+    a 429 cools down for `cooldown` seconds. When every key is unavailable,
+    acquire() waits for the first one to free up. Thread-safe, and usable from
+    any event loop.
+    """
+
+    STRATEGIES = ("least_loaded", "round_robin")
+
+    def __init__(self, api_keys, strategy="least_loaded", requests_per_minute=None, cooldown=60.0):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"unknown key strategy '{strategy}' (expected one of {', '.join(self.STRATEGIES)})")
+        self._keys = [_KeyState(key) for key in dict.fromkeys(api_keys)]
+        if not self._keys:
+            raise ValueError("a key pool needs at least one API key")
+        self._by_key = {state.key: state for state in self._keys}
+        self.strategy = strategy
+        self.requests_per_minute = requests_per_minute
+        self.cooldown = cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _available_at(self, state):
+        available_at = state.cooldown_until
+        if self.requests_per_minute and len(state.recent) >= self.requests_per_minute:
+            available_at = max(available_at, state.recent[0] + 60)
+        return available_at
+
+    def try_acquire(self):
+        """Returns (key, 0) for a leased key, or (None, seconds until one may be available)."""
+        with self._lock:
+            now = time.monotonic()
+            for state in self._keys:
+                while state.recent and state.recent[0] <= now - 60:
+                    state.recent.popleft()
+            ready = [i for i, state in enumerate(self._keys) if self._available_at(state) <= now]
+            if not ready:
+                return None, min(self._available_at(state) for state in self._keys) - now
+            if self.strategy == "round_robin":
+                index = next((i for i in ready if i >= self._next), ready[0])
+                self._next = index + 1
+            else:
+                index = min(ready, key=lambda i: (self._keys[i].in_flight, len(self._keys[i].recent)))
+            state = self._keys[index]
+            state.in_flight += 1
+            state.requests += 1
+            state.recent.append(now)
+            return state.key, 0
+
+    async def acquire(self):
+        while True:
+            key, wait = self.try_acquire()
+            if key is not None:
+                return key
+            await asyncio.sleep(max(wait, 0.01))
+
+    def release(self, key, error=None):
+        """Ends a lease; a 429 error puts the key into cooldown."""
+        with self._lock:
+            state = self._by_key[key]
+            state.in_flight -= 1
+            if error is not None:
+                state.errors += 1
+                if isinstance(error, api_exceptions.TooManyRequests):
+                    state.rate_limited += 1
+                    state.cooldown_until = max(state.cooldown_until, time.monotonic() + self.cooldown)
+
+    def stats(self):
+        """One row per key (masked to its last 4 characters) for display."""
+        with self._lock:
+            now = time.monotonic()
+            return [{
+                "key": f"…{state.key[-4:]}",
+                "in flight": state.in_flight,
+                "requests": state.requests,
+                "last minute": sum(1 for started in state.recent if started > now - 60),
+                "errors": state.errors,
+                "429s": state.rate_limited,
+                "cooldown s": round(max(0.0, state.cooldown_until - now), 1),
+            } for state in self._keys]
+
+
+class _CachedClient:
+    def __init__(self, client):
+        self.client = client
+        self.in_use = 0
+        self.evicted = False
+
+
+def _response_text(response, strict=True):
+    """Text of a GenerateContentResponse; like genai's response.text, strict raises ValueError when it has none."""
+    parts = response.candidates[0].content.parts if response.candidates else []
+    text = "".join(part.text for part in parts)
+    if strict and not parts:
+        reason = response.candidates[0].finish_reason.name if response.candidates else "no candidates"
+        raise ValueError(f"Gemini returned no text (finish reason: {reason}, "
+                         f"prompt feedback: {response.prompt_feedback})")
+    return text
+
+
+class GeminiBackend:
+    """Gemini backend with a client per API key.
+
+    A request uses the api_key passed with it, else a key leased from
+    key_pool, else the process-wide genai configuration (GOOGLE_API_KEY).
+    Keyed requests go through the public google.ai.generativelanguage async
+    client built for that key: genai.GenerativeModel only knows the
+    process-global key set by genai.configure().
+    """
+
+    name = "gemini"
+    # Per-key async clients kept; they hold gRPC channels, so sessions' keys are not kept forever.
+    MAX_CLIENTS = 32
+
+    def __init__(self, model_name=GEMINI_MODEL_NAME, key_pool=None):
+        self.model_name = model_name
+        self.key_pool = key_pool
+        self._clients = OrderedDict()  # api key -> _CachedClient, least recently used first
+        self._clients_lock = threading.Lock()
+
+    def is_retryable(self, error):
+        return is_retryable(error)
+
+    @contextlib.asynccontextmanager
+    async def _client(self, api_key):
+        """The key's async client for one request. Clients evicted from the cache are closed once idle."""
+        # Created on first use from the LLMClient loop; gRPC aio clients must stay on the loop they were made on.
+        evicted = None
+        with self._clients_lock:
+            cached = self._clients.get(api_key)
+            if cached is None:
+                from google.ai import generativelanguage as glm
+                cached = _CachedClient(glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key}))
+                self._clients[api_key] = cached
+                if len(self._clients) > self.MAX_CLIENTS:
+                    evicted = self._clients.popitem(last=False)[1]
+                    evicted.evicted = True
+                    if evicted.in_use:
+                        evicted = None  # closed by its last request instead
+            else:
+                self._clients.move_to_end(api_key)
+            cached.in_use += 1
+        if evicted is not None:
+            await evicted.client.transport.close()
+        try:
+            yield cached.client
+        finally:
+            with self._clients_lock:
+                cached.in_use -= 1
+                close = cached.evicted and not cached.in_use
+            if close:
+                await cached.client.transport.close()
+
+    async def aclose(self):
+        """Closes every cached client's gRPC channel."""
+        with self._clients_lock:
+            cached = list(self._clients.values())
+            self._clients.clear()
+        for entry in cached:
+            entry.evicted = True
+            if not entry.in_use:
+                await entry.client.transport.close()
+
+    def _request(self, prompt, generation_config, safety_settings):
+        from google.ai import generativelanguage as glm
+        model = self.model_name if self.model_name.startswith("models/") else f"models/{self.model_name}"
+        return glm.GenerateContentRequest(
+            model=model,
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+            generation_config=glm.GenerationConfig(**generation_config),
+            safety_settings=[glm.SafetySetting(category=category, threshold=threshold)
+                             for category, threshold in (safety_settings or {}).items()],
+        )
+
+    @contextlib.asynccontextmanager
+    async def _lease(self, api_key):
+        if api_key or self.key_pool is None:
+            yield api_key
+            return
+        key = await self.key_pool.acquire()
+        error = None
+        try:
+            yield key
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.key_pool.release(key, error)
+
+    async def generate(self, prompt, generation_config, safety_settings=None, api_key=None):
+        async with self._lease(api_key) as key:
+            if not key:
+                import google.generativeai as genai  # ~0.7 s to import; kept off the startup path
+                response = await genai.GenerativeModel(self.model_name).generate_content_async(
+                    prompt,
+                    generation_config=genai.GenerationConfig(**generation_config),
+                    safety_settings=safety_settings
+                )
+                return response.text
+            async with self._client(key) as client:
+                response = await client.generate_content(self._request(prompt, generation_config, safety_settings))
+            return _response_text(response)
+
+    async def stream(self, prompt, generation_config, safety_settings=None, api_key=None):
+        async with self._lease(api_key) as key:
+            if not key:
+                import google.generativeai as genai
+                response = await genai.GenerativeModel(self.model_name).generate_content_async(
+                    prompt,
+                    generation_config=genai.GenerationConfig(**generation_config),
+                    safety_settings=safety_settings,
+                    stream=True
+                )
+                async for chunk in response:
+                    try:
+                        yield chunk.text
+                    except ValueError:  # chunks without text parts (e.g. the final finish-reason chunk)
+                        continue
+                return
+            async with self._client(key) as client:
+                chunks = await client.stream_generate_content(
+                    self._request(prompt, generation_config, safety_settings))
+                async for chunk in chunks:
+                    text = _response_text(chunk, strict=False)
+                    if text:  # the final chunk may only carry the finish reason
+                        yield text
+
+
+class OpenAIBackend:
+    """Chat completions backend; generation_config uses the Gemini keys (temperature, max_output_tokens).
+
+    Per-request api_key arguments are Gemini keys and are ignored; the key comes from OPENAI_API_KEY.
+    """
+
+    name = "openai"
+
+    def __init__(self, model_name=OPENAI_MODEL_NAME, api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)  # api_key=None reads OPENAI_API_KEY
+        return self._client
+
+    def is_retryable(self, error):
+        import openai
+        if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                              asyncio.TimeoutError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+    def _request(self, prompt, generation_config):
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": generation_config.get("temperature"),
+            "max_tokens": generation_config.get("max_output_tokens"),
+        }
+
+    async def generate(self, prompt, generation_config, safety_settings=None, api_key=None):
+        response = await self._get_client().chat.completions.create(**self._request(prompt, generation_config))
+        return response.choices[0].message.content or ""
+
+    async def stream(self, prompt, generation_config, safety_settings=None, api_key=None):
+        response = await self._get_client().chat.completions.create(
+            stream=True, **self._request(prompt, generation_config))
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class StubBackendError(Exception):
+    """Injected failure; retryable ones behave like a 429."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+_SECTION_PROMPT = re.compile(r'Return ONLY a JSON object with the single key "(.+?)"\.\s*\n\n\1: (.*)\Z', re.DOTALL)
+_POSITION = re.compile(r'Position: (.*?) at (.*)')
+
+
+class StubBackend:
+    """Offline backend returning schema-valid JSON for the pipeline's prompts.
+
+    Refinement prompts get their input sections back (plus a Professional
+    Summary), per-section prompts get their section back, and cover letter
+    prompts get a letter naming the position and company. Each call waits
+    latency +/- jitter seconds. With probability error_rate it raises
+    StubBackendError instead, which is retryable unless error_retryable is False.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_retryable=True, seed=None,
+                 model_name="stub"):
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_retryable = error_retryable
+        self._random = random.Random(seed)
+
+    def is_retryable(self, error):
+        if isinstance(error, StubBackendError):
+            return error.retryable
+        return isinstance(error, asyncio.TimeoutError)
+
+    def respond(self, prompt):
+        """The response text for a prompt, without latency or errors."""
+        section = _SECTION_PROMPT.search(prompt)
+        if section:
+            return json.dumps({section.group(1): json.loads(section.group(2))}, ensure_ascii=False)
+        if "RESUME:" in prompt and '"opening"' in prompt:
+            position = _POSITION.search(prompt)
+            title, company = position.groups() if position else ("the role", "your company")
+            return json.dumps({
+                "opening": f"I am writing to apply for the {title} position at {company}.",
+                "body_paragraphs": [f"My experience matches the needs of the <b>{title}</b> role.",
+                                    "I have delivered measurable results in similar environments."],
+                "achievements": ["Reduced latency by 40%", "Led a team of 5 engineers"],
+                "closing": "I would welcome the opportunity to discuss my application.",
+            }, ensure_ascii=False)
+        marker = prompt.rfind("Resume Sections: ")
+        if marker != -1:
+            sections = json.loads(prompt[marker + len("Resume Sections: "):])
+            sections = {key: value for key, value in sections.items() if value}
+            sections.setdefault("Professional Summary", ["Engineer with a record of delivering reliable systems."])
+            return json.dumps(sections, ensure_ascii=False)
+        return json.dumps({"text": "stub response"})
+
+    async def _wait_or_fail(self):
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise StubBackendError("injected stub error", retryable=self.error_retryable)
+
+    async def generate(self, prompt, generation_config, safety_settings=None, api_key=None):
+        await self._wait_or_fail()
+        return self.respond(prompt)
+
+    async def stream(self, prompt, generation_config, safety_settings=None, api_key=None):
+        await self._wait_or_fail()
+        text = self.respond(prompt)
+        for start in range(0, len(text), 200):
+            yield text[start:start + 200]
+            await asyncio.sleep(0)
+
+
+def key_pool_from_env(api_keys=None):
+    """KeyPool over api_keys or GEMINI_API_KEYS (comma-separated), or None when there are no keys.
+
+    GEMINI_KEY_STRATEGY, GEMINI_KEY_RPM and GEMINI_KEY_COOLDOWN set the strategy, per-key quota and 429 cooldown.
+    """
+    if api_keys is None:
+        api_keys = os.environ.get("GEMINI_API_KEYS", "").split(",")
+    api_keys = [key.strip() for key in api_keys if key and key.strip()]
+    if not api_keys:
+        return None
+    return KeyPool(
+        api_keys,
+        strategy=os.environ.get("GEMINI_KEY_STRATEGY", "least_loaded"),
+        requests_per_minute=float(os.environ.get("GEMINI_KEY_RPM", "0")) or None,
+        cooldown=float(os.environ.get("GEMINI_KEY_COOLDOWN", "60")),
+    )
+
+
+def make_backend(name=None, model_name=None, api_keys=None):
+    """Builds the backend named by name or LLM_BACKEND (default gemini); LLM_MODEL overrides the model.
+
+    api_keys (default: GEMINI_API_KEYS) become the Gemini backend's key pool.
+    """
+    name = (name or os.environ.get("LLM_BACKEND") or "gemini").lower()
+    model_name = model_name or os.environ.get("LLM_MODEL") or None
+    if name == "gemini":
+        return GeminiBackend(model_name or GEMINI_MODEL_NAME, key_pool=key_pool_from_env(api_keys))
+    if name == "openai":
+        return OpenAIBackend(model_name or OPENAI_MODEL_NAME)
+    if name == "stub":
+        return StubBackend(
+            latency=float(os.environ.get("LLM_STUB_LATENCY", "0")),
+            jitter=float(os.environ.get("LLM_STUB_JITTER", "0")),
+            error_rate=float(os.environ.get("LLM_STUB_ERROR_RATE", "0")),
+            model_name=model_name or "stub",
+        )
+    raise ValueError(f"unknown LLM backend '{name}' (expected gemini, openai or stub)")
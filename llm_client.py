@@ -0,0 +1,271 @@
+"""Asyncio LLM client with rate limiting, retries and bounded concurrency.
+
+All requests run on one background event loop owned by the client, so the
+token bucket and the concurrency semaphore are shared by every caller in the
+process: Streamlit sessions (via generate_sync) and asyncio code (via await
+generate) alike.
+
+Retries use exponential backoff with full jitter on 429s and 5xx errors, and
+every call has an overall deadline that covers all of its attempts.
+
+The provider itself is a backend (see llm_backends.py): Gemini by default,
+OpenAI, or an offline stub, chosen with LLM_BACKEND. with_api_key() binds
+a view of the shared client to one caller's API key.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+from google.api_core import exceptions as api_exceptions
+
+from llm_backends import (  # noqa: F401 (re-exported)
+    GEMINI_MODEL_NAME,
+    GeminiBackend,
+    KeyPool,
+    is_retryable,
+    make_backend,
+)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LLMClient:
+    """Rate-limited, retrying LLM client usable from sync and async code.
+
+    backend defaults to GeminiBackend(model_name).
+    """
+
+    def __init__(self, model_name=GEMINI_MODEL_NAME, requests_per_minute=60, burst=None,
+                 max_concurrency=4, max_retries=4, base_delay=1.0, max_delay=30.0,
+                 attempt_timeout=60.0, deadline=180.0, backend=None):
+        self.backend = backend or GeminiBackend(model_name)
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self._loop = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def model_name(self):
+        return self.backend.model_name
+
+    # --- Event loop ---
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    # Created on the client's loop so they are never shared across loops.
+                    self._bucket = TokenBucket(self.requests_per_minute / 60.0, self.burst)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=_run, name="llm-client", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def close(self):
+        with self._start_lock:
+            if self._loop is not None:
+                aclose = getattr(self.backend, "aclose", None)
+                if aclose is not None:  # e.g. GeminiBackend's per-key gRPC channels
+                    asyncio.run_coroutine_threadsafe(aclose(), self._loop).result()
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    # --- Public API ---
+    # api_key, where given, is used for that request only (see GeminiBackend).
+
+    def with_api_key(self, api_key):
+        """A view of this client whose requests use api_key; it shares the loop, rate limit and backend."""
+        return KeyedLLMClient(self, api_key) if api_key else self
+
+    async def generate(self, prompt, generation_config, safety_settings=None, deadline=None, api_key=None):
+        """Returns the response text for one prompt. Awaitable from any event loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._generate(prompt, generation_config, safety_settings, deadline, api_key), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def generate_sync(self, prompt, generation_config, safety_settings=None, deadline=None, api_key=None):
+        """Blocking variant of generate() for threads without an event loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._generate(prompt, generation_config, safety_settings, deadline, api_key), self._ensure_loop())
+        return future.result()
+
+    async def stream(self, prompt, generation_config, safety_settings=None, deadline=None, api_key=None):
+        """Async iterator over response text chunks as the backend streams them."""
+        loop = self._ensure_loop()
+        chunks = self._stream(prompt, generation_config, safety_settings, deadline, api_key)
+        try:
+            while True:
+                has_chunk, chunk = await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(_next_chunk(chunks), loop))
+                if not has_chunk:
+                    return
+                yield chunk
+        finally:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(chunks.aclose(), loop))
+
+    def stream_sync(self, prompt, generation_config, safety_settings=None, deadline=None, api_key=None):
+        """Blocking iterator over response text chunks."""
+        loop = self._ensure_loop()
+        chunks = self._stream(prompt, generation_config, safety_settings, deadline, api_key)
+        try:
+            while True:
+                has_chunk, chunk = asyncio.run_coroutine_threadsafe(_next_chunk(chunks), loop).result()
+                if not has_chunk:
+                    return
+                yield chunk
+        finally:
+            asyncio.run_coroutine_threadsafe(chunks.aclose(), loop).result()
+
+    # --- Internals (run on the client loop) ---
+
+    async def _stream(self, prompt, generation_config, safety_settings, deadline, api_key):
+        """Streams one request. Retries happen only before the first chunk has been yielded."""
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            started = False
+            await asyncio.wait_for(self._bucket.acquire(), max(0, deadline_at - time.monotonic()))
+            await asyncio.wait_for(self._semaphore.acquire(), max(0, deadline_at - time.monotonic()))
+            chunks = self.backend.stream(prompt, generation_config, safety_settings, api_key=api_key)
+            try:
+                # The first chunk (connection and time to first token) gets the attempt timeout.
+                timeout = min(self.attempt_timeout, max(0, deadline_at - time.monotonic()))
+                while True:
+                    try:
+                        text = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        return
+                    started = True
+                    yield text
+                    timeout = max(0, deadline_at - time.monotonic())
+            except Exception as e:
+                if started or not self.backend.is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                if time.monotonic() + delay >= deadline_at:
+                    raise
+            finally:
+                await chunks.aclose()
+                self._semaphore.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _generate(self, prompt, generation_config, safety_settings, deadline, api_key):
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise api_exceptions.DeadlineExceeded("LLM call deadline exceeded")
+            try:
+                # The attempt timeout also covers time spent queued on the
+                # rate limiter and semaphore, so the deadline is end to end.
+                return await asyncio.wait_for(
+                    self._attempt(prompt, generation_config, safety_settings, api_key),
+                    min(self.attempt_timeout, remaining)
+                )
+            except Exception as e:
+                if not self.backend.is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                if time.monotonic() + delay >= deadline_at:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, prompt, generation_config, safety_settings, api_key):
+        await self._bucket.acquire()
+        async with self._semaphore:
+            return await self.backend.generate(prompt, generation_config, safety_settings, api_key=api_key)
+
+
+class KeyedLLMClient:
+    """LLMClient bound to one API key, e.g. the key a Streamlit session entered."""
+
+    def __init__(self, client, api_key):
+        self.client = client
+        self.api_key = api_key
+
+    @property
+    def model_name(self):
+        return self.client.model_name
+
+    @property
+    def backend(self):
+        return self.client.backend
+
+    def with_api_key(self, api_key):
+        return self.client.with_api_key(api_key)
+
+    async def generate(self, prompt, generation_config, safety_settings=None, deadline=None):
+        return await self.client.generate(prompt, generation_config, safety_settings, deadline, self.api_key)
+
+    def generate_sync(self, prompt, generation_config, safety_settings=None, deadline=None):
+        return self.client.generate_sync(prompt, generation_config, safety_settings, deadline, self.api_key)
+
+    def stream(self, prompt, generation_config, safety_settings=None, deadline=None):
+        return self.client.stream(prompt, generation_config, safety_settings, deadline, self.api_key)
+
+    def stream_sync(self, prompt, generation_config, safety_settings=None, deadline=None):
+        return self.client.stream_sync(prompt, generation_config, safety_settings, deadline, self.api_key)
+
+
+async def _next_chunk(chunks):
+    """Advances an async generator from another loop; returns (has_chunk, chunk)."""
+    try:
+        return True, await chunks.__anext__()
+    except StopAsyncIteration:
+        return False, None
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Process-wide client configured from LLM_BACKEND / GEMINI_API_KEYS / GEMINI_RPM / GEMINI_MAX_CONCURRENCY."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = LLMClient(
+                requests_per_minute=float(os.environ.get("GEMINI_RPM", "60")),
+                max_concurrency=int(os.environ.get("GEMINI_MAX_CONCURRENCY", "4")),
+                backend=make_backend(),
+            )
+        return _default_client
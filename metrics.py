@@ -0,0 +1,236 @@
+"""Per-stage timing and counters for the pipeline, exportable in Prometheus text format.
+
+Wrap a stage in a span to record its latency, input size, token count and
+whether it was served from a cache:
+
+    with get_metrics().span("extract_text", input_bytes=len(data)) as span:
+        text = cache.get_or_compute(key, "text", span.computed(lambda: extract_text(data)))
+
+Latencies and input sizes go into fixed-bucket histograms (cumulative, as
+Prometheus expects). The most recent latencies per stage are also kept to
+show p50/p95 in the UI. prometheus_text() renders everything in the text
+exposition format. write_textfile() writes it for node_exporter's textfile
+collector, and serve() exposes it on an HTTP /metrics endpoint.
+"""
+import bisect
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "resume_pipeline"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+RECENT_SAMPLES = 512
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yields (upper bound label, cumulative count) including +Inf."""
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            yield (bound if bound == "+Inf" else repr(float(bound))), total
+
+
+class Span:
+    """One timed execution of a stage; attributes set inside the block are recorded on exit.
+
+    Set failed = True for a stage that reports failure by its return value
+    (the LLM stages return None) rather than by raising.
+    """
+
+    def __init__(self, stage, input_bytes=None):
+        self.stage = stage
+        self.input_bytes = input_bytes
+        self.output_tokens = None
+        self.cache_hit = None
+        self.failed = False
+        self.seconds = None
+
+    def computed(self, func):
+        """Wraps a cache's compute callback: the span counts as a hit unless the callback runs."""
+        self.cache_hit = True
+
+        def compute(*args, **kwargs):
+            self.cache_hit = False
+            return func(*args, **kwargs)
+        return compute
+
+
+class Metrics:
+    """Thread-safe registry of per-stage latency, size, token and cache metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._sizes = {}
+        self._recent = defaultdict(lambda: deque(maxlen=RECENT_SAMPLES))
+        self._errors = defaultdict(int)
+        self._tokens = defaultdict(int)  # (stage, direction) -> tokens
+        self._cache = defaultdict(int)  # (cache, "hit"|"miss") -> count
+
+    def span(self, stage, input_bytes=None):
+        return _SpanContext(self, Span(stage, input_bytes))
+
+    def observe(self, span, failed=False):
+        with self._lock:
+            if span.stage not in self._latency:
+                self._latency[span.stage] = Histogram(LATENCY_BUCKETS)
+            self._latency[span.stage].observe(span.seconds)
+            self._recent[span.stage].append(span.seconds)
+            if span.input_bytes is not None:
+                if span.stage not in self._sizes:
+                    self._sizes[span.stage] = Histogram(SIZE_BUCKETS)
+                self._sizes[span.stage].observe(span.input_bytes)
+            if failed:
+                self._errors[span.stage] += 1
+            if span.output_tokens:
+                self._tokens[(span.stage, "output")] += span.output_tokens
+            if span.cache_hit is not None:
+                self._cache[(span.stage, "hit" if span.cache_hit else "miss")] += 1
+
+    def record_tokens(self, stage, tokens, direction="prompt"):
+        with self._lock:
+            self._tokens[(stage, direction)] += tokens
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            self._cache[(cache, "hit" if hit else "miss")] += 1
+
+    def summary(self):
+        """Per-stage rows for display: calls, p50/p95/max ms (recent calls), errors and estimated tokens."""
+        with self._lock:
+            rows = []
+            for stage, histogram in self._latency.items():
+                recent = sorted(self._recent[stage])
+                rows.append({
+                    "stage": stage,
+                    "calls": histogram.count,
+                    "p50 ms": round(statistics.median(recent) * 1000, 1),
+                    "p95 ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1),
+                    "max ms": round(recent[-1] * 1000, 1),
+                    "errors": self._errors[stage],
+                    "prompt tokens": self._tokens.get((stage, "prompt"), 0),
+                    "output tokens": self._tokens.get((stage, "output"), 0),
+                })
+            return rows
+
+    def cache_summary(self):
+        """{cache or stage: (hits, misses)}."""
+        with self._lock:
+            names = {name for name, _ in self._cache}
+            return {name: (self._cache[(name, "hit")], self._cache[(name, "miss")]) for name in sorted(names)}
+
+    def prometheus_text(self):
+        with self._lock:
+            lines = [f"# HELP {PREFIX}_stage_seconds Wall-clock latency of a pipeline stage.",
+                     f"# TYPE {PREFIX}_stage_seconds histogram"]
+            lines += _histogram_lines(f"{PREFIX}_stage_seconds", self._latency)
+            lines += [f"# HELP {PREFIX}_stage_input_bytes Input size of a pipeline stage.",
+                      f"# TYPE {PREFIX}_stage_input_bytes histogram"]
+            lines += _histogram_lines(f"{PREFIX}_stage_input_bytes", self._sizes)
+            lines += [f"# HELP {PREFIX}_stage_errors_total Stage executions that raised.",
+                      f"# TYPE {PREFIX}_stage_errors_total counter"]
+            lines += [f'{PREFIX}_stage_errors_total{{stage="{_escape(s)}"}} {n}' for s, n in self._errors.items()]
+            lines += [f"# HELP {PREFIX}_tokens_total Estimated LLM tokens by stage and direction.",
+                      f"# TYPE {PREFIX}_tokens_total counter"]
+            lines += [f'{PREFIX}_tokens_total{{stage="{_escape(s)}",direction="{d}"}} {n}'
+                      for (s, d), n in self._tokens.items()]
+            lines += [f"# HELP {PREFIX}_cache_requests_total Cache lookups by cache and result.",
+                      f"# TYPE {PREFIX}_cache_requests_total counter"]
+            lines += [f'{PREFIX}_cache_requests_total{{cache="{_escape(c)}",result="{r}"}} {n}'
+                      for (c, r), n in self._cache.items()]
+            return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Writes prometheus_text() atomically, for node_exporter's textfile collector."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serves prometheus_text() at http://host:port/metrics from a daemon thread; returns the server.
+
+        Only local clients can connect by default; pass host="0.0.0.0" to expose it on every interface.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # keep scrapes out of stderr
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+class _SpanContext:
+    def __init__(self, metrics, span):
+        self._metrics = metrics
+        self._span = span
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        self._span.seconds = time.perf_counter() - self._start
+        self._metrics.observe(self._span, failed=exc_type is not None or self._span.failed)
+        return False
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name, histograms):
+    lines = []
+    for stage, histogram in histograms.items():
+        label = f'stage="{_escape(stage)}"'
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{label}}} {histogram.count}")
+    return lines
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Process-wide registry shared by the app, the pipeline and batch runs."""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
@@ -0,0 +1,236 @@
+"""ReportLab rendering for the resume and cover letter PDFs.
+
+A PDFRenderer builds its stylesheet, section-matching patterns and bullet
+cleanup patterns once; rendering a document then only builds flowables and
+lays them out. Styles are never mutated after construction, so one renderer
+can be shared by every thread of a batch run (see get_pdf_renderer()).
+"""
+import logging
+import re
+import threading
+
+from reportlab.lib.colors import darkblue
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+logger = logging.getLogger("resume_pipeline")
+
+# Sections rendered first, in this order; anything else follows in input order.
+SECTION_ORDER = [
+    "Professional Summary", "Summary", "Objective",
+    "Technical Skills", "Skills", "Core Competencies",
+    "Experience", "Work Experience", "Professional Experience",
+    "Projects", "Education", "Certifications", "Awards"
+]
+
+# Printed size of the header photo, in points.
+PHOTO_SIZE = 0.8 * inch
+
+_MARKDOWN_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_BULLET_PREFIX = re.compile(r'^(?:bullet\s*|•\s*|[-*]\s*)', re.IGNORECASE)
+
+
+def clean_bullet(text):
+    """Turns **bold** into <b> markup and drops a leading bullet marker ("•", "-", "*", "bullet")."""
+    return _BULLET_PREFIX.sub('', _MARKDOWN_BOLD.sub(r'<b>\1</b>', text)).strip()
+
+
+class PDFRenderer:
+    """Shared styles and layout for resume and cover letter PDFs."""
+
+    def __init__(self, font_name='Helvetica', bold_font_name='Helvetica-Bold'):
+        self.font_name = font_name
+        self.bold_font_name = bold_font_name
+        self.styles = self._build_styles()
+        self.section_order = [
+            (name, re.compile(r'\b' + re.escape(name.lower()) + r'\b')) for name in SECTION_ORDER
+        ]
+
+    def _build_styles(self):
+        styles = getSampleStyleSheet()
+
+        # Resume
+        styles.add(ParagraphStyle(name='SectionHeader', fontSize=12, fontName=self.bold_font_name,
+                                  spaceAfter=6, textColor=darkblue))
+        body_text_style = styles['BodyText']
+        body_text_style.fontSize = 10
+        body_text_style.fontName = self.font_name
+        body_text_style.spaceAfter = 4
+        body_text_style.alignment = TA_JUSTIFY
+        styles.add(ParagraphStyle(name='BulletText', fontSize=10, fontName=self.font_name,
+                                  spaceAfter=3, leftIndent=0.25 * inch, firstLineIndent=-0.25 * inch))
+
+        # Cover letter
+        styles.add(ParagraphStyle(name='Address', fontSize=10, fontName=self.font_name, alignment=TA_RIGHT))
+        styles.add(ParagraphStyle(name='Date', fontSize=11, fontName=self.font_name, spaceAfter=12))
+        styles.add(ParagraphStyle(name='Recipient', fontSize=11, fontName=self.font_name, spaceAfter=12))
+        styles.add(ParagraphStyle(name='Subject', fontSize=12, fontName=self.bold_font_name,
+                                  spaceAfter=12, alignment=TA_CENTER))
+        styles.add(ParagraphStyle(name='Body', fontSize=11, fontName=self.font_name,
+                                  spaceAfter=12, alignment=TA_JUSTIFY))
+        bullet_style = styles['Bullet']
+        bullet_style.fontSize = 11
+        bullet_style.fontName = self.font_name
+        bullet_style.spaceAfter = 6
+        bullet_style.leftIndent = 0.25 * inch
+        bullet_style.firstLineIndent = -0.25 * inch
+        return styles
+
+    # --- Resume ---
+
+    def _ordered_sections(self, sections):
+        """Yields (key, content) with the known sections first, then the rest in input order."""
+        processed = set()
+        for _, pattern in self.section_order:
+            for key in sections:
+                if pattern.search(key.lower()):
+                    if key not in processed and sections[key]:
+                        processed.add(key)
+                        yield key, sections[key]
+                    break
+        for key, content in sections.items():
+            if key not in processed and content:
+                yield key, content
+
+    def _item_flowables(self, item):
+        """Flowables for one section item: an entry dict with title/bullets, or a plain string."""
+        if isinstance(item, dict):  # e.g., Experience/Projects with title and bullets
+            flowables = []
+            if item.get("title"):
+                flowables.append(Paragraph(f"<b>{item['title']}</b>", self.styles['BodyText']))
+            for bullet in item.get("bullets", []):
+                flowables.extend(self._item_flowables(bullet))
+            return flowables
+        if isinstance(item, str):
+            text = clean_bullet(item)
+            if text:
+                return [Paragraph(f"• {text}", self.styles['BulletText'])]
+        return []
+
+    def resume_story(self, sections):
+        """Builds the flowables for a resume from its sections."""
+        story = []
+        for key, content in self._ordered_sections(sections):
+            story.append(Paragraph(f"<b>{key.upper()}</b>", self.styles['SectionHeader']))
+            story.append(Spacer(1, 0.1 * inch))
+            for item in content:
+                story.extend(self._item_flowables(item))
+            story.append(Spacer(1, 0.15 * inch))
+        return story
+
+    def _draw_resume_header(self, canvas, personal_info, photo_image):
+        canvas.saveState()
+        canvas.setFillColor(darkblue)
+        canvas.rect(0, letter[1] - 1.2 * inch, letter[0], 1.2 * inch, fill=1)
+        canvas.setFillColor('white')
+        canvas.setFont(self.bold_font_name, 22)
+        canvas.drawString(0.5 * inch, letter[1] - 0.6 * inch, personal_info.get('name', 'Your Name').upper())
+
+        canvas.setFont(self.font_name, 10)
+        y_pos = letter[1] - 0.9 * inch
+        for key in ('phone', 'email', 'linkedin', 'github'):
+            info = personal_info.get(key, '')
+            if info:
+                canvas.drawString(0.5 * inch, y_pos, info)
+                y_pos -= 0.15 * inch
+
+        if photo_image:
+            try:
+                canvas.drawImage(photo_image, letter[0] - 1.3 * inch, letter[1] - 1.1 * inch,
+                                 width=PHOTO_SIZE, height=PHOTO_SIZE, mask='auto')
+            except Exception as e:
+                logger.warning(f"Photo error: {e}")
+        canvas.restoreState()
+
+    def render_resume(self, sections, output, personal_info, photo_image=None):
+        """Lays out a resume into output (a path or writable binary buffer). Raises on layout errors."""
+        doc = SimpleDocTemplate(output, pagesize=letter,
+                                topMargin=1.3 * inch, bottomMargin=0.5 * inch,
+                                leftMargin=0.5 * inch, rightMargin=0.5 * inch)
+
+        def draw_header(canvas, doc):
+            self._draw_resume_header(canvas, personal_info, photo_image)
+
+        doc.build(self.resume_story(sections), onFirstPage=draw_header, onLaterPages=draw_header)
+
+    # --- Cover letter ---
+
+    def cover_letter_story(self, personal_info, company_info, position_title, cover_letter_content,
+                           language="english"):
+        """Builds the flowables for a cover letter."""
+        styles = self.styles
+        story = []
+
+        sender_lines = [
+            personal_info.get('name', ''),
+            personal_info.get('address', ''),
+            personal_info.get('city', ''),
+            f"{personal_info.get('phone', '')} | {personal_info.get('email', '')}"
+        ]
+        sender_text = "<br/>".join([line for line in sender_lines if line])
+        story.append(Paragraph(sender_text, styles['Address']))
+        story.append(Spacer(1, 0.3*inch))
+
+        story.append(Paragraph(company_info['date'], styles['Date']))
+
+        recipient_text = f"<b>{company_info['recruiter']}</b><br/>{company_info['company']}<br/>{company_info['company_city']}"
+        story.append(Paragraph(recipient_text, styles['Recipient']))
+
+        generic_recruiter = company_info['recruiter'].lower() in ['hiring manager', 'recruiter']
+        if language == "french":
+            subject = f"<b>Objet : Candidature pour le poste de {position_title}</b>"
+            salutation = "Madame, Monsieur," if generic_recruiter else f"Cher/Chère {company_info['recruiter']},"
+        else:
+            subject = f"<b>Subject: Application for the Position of {position_title}</b>"
+            salutation = "Dear Sir or Madam," if generic_recruiter else f"Dear {company_info['recruiter']},"
+
+        story.append(Paragraph(subject, styles['Subject']))
+        story.append(Paragraph(salutation, styles['Body']))
+
+        if cover_letter_content:
+            story.append(Paragraph(cover_letter_content.get('opening', ''), styles['Body']))
+
+            for para in cover_letter_content.get('body_paragraphs', []):
+                story.append(Paragraph(para, styles['Body']))
+
+            if cover_letter_content.get('achievements'):
+                achievements_header = "Mes principales réalisations :" if language == "french" else "Key Achievements:"
+                story.append(Paragraph(f"<b>{achievements_header}</b>", styles['Body']))
+                for achievement in cover_letter_content['achievements']:
+                    story.append(Paragraph(f"• {achievement}", styles['Bullet']))
+
+            story.append(Paragraph(cover_letter_content.get('closing', ''), styles['Body']))
+
+        closing_phrase = "Cordialement," if language == "french" else "Sincerely,"
+        story.append(Paragraph(closing_phrase, styles['Body']))
+        story.append(Spacer(1, 0.2*inch))
+        story.append(Paragraph(f"<b>{personal_info.get('name', '')}</b>", styles['Body']))
+
+        enclosure_text = "Pièce jointe : Dossier de candidature" if language == "french" else "Enclosure: Application file"
+        story.append(Spacer(1, 0.1*inch))
+        story.append(Paragraph(enclosure_text, styles['Body']))
+        return story
+
+    def render_cover_letter(self, output, personal_info, company_info, position_title, cover_letter_content,
+                            language="english"):
+        """Lays out a cover letter into output (a path or writable binary buffer). Raises on layout errors."""
+        doc = SimpleDocTemplate(output, pagesize=letter, topMargin=0.75*inch,
+                                bottomMargin=0.75*inch, leftMargin=0.75*inch, rightMargin=0.75*inch)
+        doc.build(self.cover_letter_story(personal_info, company_info, position_title,
+                                          cover_letter_content, language))
+
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer():
+    """Process-wide renderer, so styles and patterns are built once per process."""
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = PDFRenderer()
+        return _default_renderer
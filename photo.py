@@ -0,0 +1,95 @@
+"""Profile photo preprocessing for the resume header.
+
+Uploaded photos are often multi-megabyte phone JPEGs, while the header prints
+them at under an inch. PhotoProcessor decodes a photo once with Pillow. It
+applies the EXIF orientation, center-crops to the printed aspect ratio and
+downsamples to the printed size at a target DPI, then recompresses. Results
+are cached by content hash, so rendering the same photo into many PDFs
+decodes it only once.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+from reportlab.lib.utils import ImageReader
+
+DEFAULT_DPI = 300
+JPEG_QUALITY = 85
+
+
+def prepare_photo(data, width_points, height_points, dpi=DEFAULT_DPI, quality=JPEG_QUALITY):
+    """Returns the photo bytes cropped and scaled to print at width x height points (1/72 inch) and dpi.
+
+    Opaque images are recompressed as JPEG. Images with transparency stay PNG,
+    so that mask='auto' still applies when the photo is drawn.
+    """
+    size = (max(1, round(width_points / 72 * dpi)), max(1, round(height_points / 72 * dpi)))
+    with Image.open(io.BytesIO(data)) as image:
+        # For JPEGs, let the decoder scale down by a power of two before the full decode
+        # (square request, as EXIF rotation is only applied afterwards).
+        image.draft("RGB", (max(size) * 2, max(size) * 2))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        if image.width > size[0] or image.height > size[1]:
+            image = ImageOps.fit(image, size, Image.LANCZOS)
+        else:  # already at or below print resolution: crop only, never upscale
+            side = min(image.width, image.height)
+            ratio = size[0] / size[1]
+            crop = (min(image.width, round(side * ratio)), min(image.height, round(side / ratio)))
+            image = ImageOps.fit(image, crop, Image.LANCZOS)
+
+        output = io.BytesIO()
+        if has_alpha:
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.save(output, format="JPEG", quality=quality, optimize=True)
+        return output.getvalue()
+
+
+class PhotoProcessor:
+    """Caches prepared photos by (content hash, print size, dpi)."""
+
+    def __init__(self, dpi=DEFAULT_DPI, max_entries=32):
+        self.dpi = dpi
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepared_bytes(self, data, width_points, height_points):
+        """Prepared photo bytes, computed once per distinct photo and size."""
+        key = (hashlib.blake2b(data, digest_size=16).digest(), width_points, height_points, self.dpi)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        prepared = prepare_photo(data, width_points, height_points, self.dpi)
+        with self._lock:
+            self._cache[key] = prepared
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return prepared
+
+    def reader(self, data, width_points, height_points):
+        """An ImageReader over the prepared photo.
+
+        The prepared bytes are cached rather than the ImageReader itself,
+        because an ImageReader keeps a file position and is not safe to share
+        between concurrent renders. Wrapping cached bytes costs no decode.
+        """
+        return ImageReader(io.BytesIO(self.prepared_bytes(data, width_points, height_points)))
+
+
+_default_processor = None
+_default_processor_lock = threading.Lock()
+
+
+def get_photo_processor():
+    """Process-wide processor, so a photo reused across PDFs is decoded once."""
+    global _default_processor
+    with _default_processor_lock:
+        if _default_processor is None:
+            _default_processor = PhotoProcessor()
+        return _default_processor
@@ -0,0 +1,937 @@
+"""UI-free resume pipeline: extraction, parsing, Gemini refinement and PDF rendering.
+
+Everything here is importable without Streamlit so the same stages can be driven
+from the web app (main.py) or headless from the batch CLI (batch.py).
+"""
+import asyncio
+import contextlib
+import io
+import os
+import logging
+import re
+from google.api_core import exceptions as api_exceptions
+from collections import OrderedDict
+import json
+
+from headings import headings_for, is_entry_title, is_likely_bullet
+from json_stream import TopLevelObjectParser
+from keywords import get_keyword_engine
+from language import get_language_detector
+from llm_client import get_llm_client
+from metrics import get_metrics
+from token_budget import (
+    DEFAULT_JD_TOKEN_BUDGET,
+    DEFAULT_RESUME_TOKEN_BUDGET,
+    PromptReport,
+    compact_json,
+    trim_to_budget,
+    unique_terms,
+)
+
+# Heavy dependencies (PyPDF2, python-docx, NLTK, ReportLab, Pillow, requests,
+# google-generativeai) are imported where first used, so importing this module
+# (and every Streamlit rerun of main.py) stays cheap. NLTK stopwords are loaded,
+# and downloaded if missing, on first keyword extraction (keywords.py).
+
+# Errors and warnings are logged rather than shown directly; main.py forwards
+# this logger to st.error/st.warning, the batch CLI leaves it on stderr.
+logger = logging.getLogger("resume_pipeline")
+
+# Bump whenever extract_text or parse_resume_sections changes its output, so
+# cached results (see cache.py) from older code are not reused.
+PARSER_VERSION = "3"
+
+# --- Utility Functions ---
+
+# With extract_text(..., parallel=None) (auto), PDFs with at least this many
+# pages are split across worker processes. The default, parallel=False, never
+# starts processes: callers such as batch.py already run inside a process pool,
+# and a pool per Streamlit rerun costs more to spawn than it saves.
+PARALLEL_PDF_PAGE_THRESHOLD = 8
+PDF_PAGES_PER_WORKER = 4
+
+def _open_binary(source):
+    """Opens a path, bytes-like object or binary file object as a readable stream.
+
+    Only paths produce a stream the caller owns; buffers are wrapped (or
+    rewound) without copying to disk.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return io.BytesIO(source.read())
+
+def _file_type(source, file_type=None):
+    """Returns the lowercase extension ('.pdf', '.docx', ...) for a path or an in-memory upload."""
+    name = file_type or (source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", ""))
+    name = str(name).lower()
+    if name and not name.startswith('.') and '.' not in name:
+        name = '.' + name
+    return os.path.splitext(name)[1] or name
+
+def _extract_pdf_page_range(source, start, stop):
+    """Worker for parallel extraction: opens the PDF independently and returns text for pages [start, stop)."""
+    import PyPDF2
+    with _open_binary(source) as f:
+        reader = PyPDF2.PdfReader(f)
+        return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+def iter_pdf_pages(source, max_pages=None, max_bytes=None, parallel=False, max_workers=None, executor=None):
+    """Yields the text of a PDF one page at a time, in page order.
+
+    source may be a path, bytes/memoryview or a binary file object.
+    max_pages / max_bytes stop extraction early (the page that crosses the byte
+    cap is truncated). parallel=False (the default) extracts in this process,
+    True in worker processes, None in worker processes for long documents
+    only. Workers come from `executor` when given (a process pool the caller
+    shares across documents), else from a pool started for this call.
+    """
+    import PyPDF2
+    if not isinstance(source, (str, os.PathLike, bytes)):
+        # Workers need something picklable; buffers are handed over as bytes.
+        with _open_binary(source) as f:
+            source = f.getvalue()
+    with _open_binary(source) as f:
+        page_count = len(PyPDF2.PdfReader(f).pages)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    if parallel is None:
+        parallel = page_count >= PARALLEL_PDF_PAGE_THRESHOLD
+
+    def _pages():
+        if not parallel or page_count <= PDF_PAGES_PER_WORKER:
+            with _open_binary(source) as f:
+                reader = PyPDF2.PdfReader(f)
+                for i in range(page_count):
+                    yield reader.pages[i].extract_text() or ""
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        ranges = [(start, min(start + PDF_PAGES_PER_WORKER, page_count))
+                  for start in range(0, page_count, PDF_PAGES_PER_WORKER)]
+        workers = max_workers or min(len(ranges), os.cpu_count() or 1)
+        with contextlib.nullcontext(executor) if executor else ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_pdf_page_range, source, start, stop) for start, stop in ranges]
+            try:
+                for future in futures:
+                    yield from future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    remaining = max_bytes
+    for page_text in _pages():
+        if remaining is not None:
+            encoded = page_text.encode("utf-8")
+            if len(encoded) >= remaining:
+                yield encoded[:remaining].decode("utf-8", errors="ignore")
+                return
+            remaining -= len(encoded)
+        yield page_text
+
+def extract_text(source, file_type=None, max_pages=None, max_bytes=None, parallel=False, executor=None):
+    """Extracts text from DOCX or PDF files.
+
+    source is a path, bytes/memoryview or binary file object. For buffers the
+    type comes from file_type (e.g. ".pdf") or the object's .name attribute.
+    parallel and executor apply to PDFs (see iter_pdf_pages).
+    """
+    extension = _file_type(source, file_type)
+    if extension == '.docx':
+        from docx import Document
+        with _open_binary(source) as f:
+            doc = Document(f)
+        return '\n'.join([p.text.strip() for p in doc.paragraphs if p.text.strip()])
+    elif extension == '.pdf':
+        return ''.join(page + "\n" for page in iter_pdf_pages(
+            source, max_pages, max_bytes, parallel, executor=executor))
+    else:
+        logger.warning(f"File type {extension.lstrip('.') or 'unknown'} not directly supported for text extraction.")
+        return ""
+
+def detect_language(text):
+    """Detects language of the text, defaults to English if detection fails."""
+    return get_language_detector().detect(text)
+
+def fetch_job_description(input_text_or_url):
+    """Fetches job description from URL or returns the input text directly.
+
+    URLs go through the shared JobDescriptionFetcher (jd_fetcher.py), which
+    reuses connections, caches responses and strips page chrome.
+    """
+    if input_text_or_url.strip().lower().startswith('http'):
+        import requests
+        from jd_fetcher import get_fetcher
+        try:
+            return get_fetcher().fetch(input_text_or_url.strip())
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching URL: {e}")
+            return ""
+    else:
+        return input_text_or_url
+
+def extract_keywords(text, top_n=15, language='english', ngram_range=(1, 1), scoring="auto"):
+    """Extracts top N keywords from text, excluding stopwords.
+
+    Uses the shared KeywordEngine (keywords.py). scoring="auto" ranks by
+    TF-IDF when a document-frequency table is loaded (KEYWORD_DF_PATH) and by
+    plain frequency otherwise; ngram_range=(1, 2) adds phrases like "machine learning".
+    """
+    engine = get_keyword_engine()
+    if scoring == "auto":
+        scoring = "tfidf" if engine.documents else "frequency"
+    return engine.top_keywords(text, top_n, language, ngram_range, scoring)
+
+def extract_keywords_batch(texts, top_n=15, language='english', ngram_range=(1, 1), scoring="auto"):
+    """extract_keywords for many documents in one call."""
+    engine = get_keyword_engine()
+    if scoring == "auto":
+        scoring = "tfidf" if engine.documents else "frequency"
+    return engine.score_batch(texts, top_n, language, ngram_range, scoring)
+
+# --- Personal Details Scanner ---
+
+# Lines containing any of these can't be the candidate's name.
+_CONTACT_HINT = re.compile(r'(@|\.com|github|linkedin|http|https|\d[\d\s\-()]+\d)', re.IGNORECASE)
+# One alternation over every contact field, tried left to right at each position,
+# so the header is traversed once instead of once per field.
+_DETAIL_SCANNER = re.compile(
+    r'(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'
+    r'|(?P<linkedin>(?i:linkedin\.com/in/[a-zA-Z0-9_-]+))'
+    r'|(?P<github>(?i:github\.com/[a-zA-Z0-9_-]+))'
+    r'|(?P<street>(?i:\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln)))'
+    r'|(?P<phone>(?:\+?\d{1,3}[\s-]?)?(?:\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{4}|\d{10}))'
+    r'|(?P<citystate>(?P<city>[A-Z][a-z]+(?: [A-Z][a-z]+)*),\s*[A-Z]{2}(?P<zip>\s*\d{5})?)'
+)
+_PERSONAL_FIELDS = ("name", "email", "phone", "linkedin", "github", "address", "city")
+
+def _phone_confidence(phone):
+    return 0.9 if phone.startswith('+') or re.search(r'[\s\-()]', phone) else 0.7
+
+def _name_confidence(name):
+    words = name.split()
+    return 0.85 if 2 <= len(words) <= 3 and all(w[:1].isupper() for w in words) else 0.5
+
+def extract_personal_details(text, with_details=False):
+    """Extracts personal information from resume text.
+
+    Scans the first 20 lines once with a precompiled combined pattern. With
+    with_details=True returns (info, details) where details maps each found
+    field to {"span": (start, end), "confidence": 0..1}; spans index into the
+    header (the first 20 lines joined by newlines).
+    """
+    personal_info = dict.fromkeys(_PERSONAL_FIELDS, "")
+    details = {}
+
+    lines = text.splitlines()[:20]  # Check first 20 lines
+    full_text = '\n'.join(lines)
+
+    # Extract name (first substantial line that doesn't contain contact info)
+    offset = 0
+    for raw_line in lines:
+        line = raw_line.strip()
+        if line and not _CONTACT_HINT.search(line) and len(line.split()) <= 4:
+            personal_info["name"] = line
+            start = offset + raw_line.index(line)
+            details["name"] = {"span": (start, start + len(line)), "confidence": _name_confidence(line)}
+            break
+        offset += len(raw_line) + 1
+
+    street = citystate_zip = None
+    for match in _DETAIL_SCANNER.finditer(full_text):
+        field = match.lastgroup if match.lastgroup not in ("city", "zip") else "citystate"
+        value = match.group(field)
+        if field in ("email", "phone") and not personal_info[field]:
+            personal_info[field] = value
+            confidence = 0.95 if field == "email" else _phone_confidence(value)
+            details[field] = {"span": match.span(field), "confidence": confidence}
+        elif field in ("linkedin", "github") and not personal_info[field]:
+            personal_info[field] = "https://" + value
+            details[field] = {"span": match.span(field), "confidence": 0.95}
+        elif field == "street" and street is None:
+            street = match
+        elif field == "citystate":
+            if match.group("zip") and citystate_zip is None:
+                citystate_zip = match
+            if not personal_info["city"]:
+                personal_info["city"] = match.group("city")
+                details["city"] = {"span": match.span("city"), "confidence": 0.6}
+
+    # Street addresses take priority over "City, ST 12345"
+    address = street or citystate_zip
+    if address:
+        personal_info["address"] = address.group(0)
+        details["address"] = {"span": address.span(), "confidence": 0.7 if street else 0.6}
+
+    if with_details:
+        return personal_info, details
+    return personal_info
+
+def extract_personal_details_batch(texts, with_details=False):
+    """extract_personal_details for many documents in one call."""
+    return [extract_personal_details(text, with_details) for text in texts]
+
+# Fallback heading: a short line made of words ending with a colon, e.g. "Tools & Platforms:"
+_COLON_HEADING = re.compile(r'^[A-Za-z\s&]+:\s*$')
+
+def parse_resume_sections(text, language="english"):
+    """Parses resume text into sections, with special handling for Experience and Projects.
+
+    language is the resume's own language (detect_language); it selects which
+    headings are recognized (see headings.headings_for).
+    """
+    classifier = headings_for(language)
+    sections = OrderedDict()
+    current_section = None
+
+    lines = text.split('\n')
+    temp_content_buffer = [] # Buffer to hold lines before they are assigned to a section
+
+    def _process_buffer(section_name, buffer):
+        if not buffer:
+            return []
+
+        # Special handling for Experience and Projects to structure them
+        if section_name in ["Experience", "Projects"]:
+            parsed_entries = []
+            current_entry = None
+
+            for i, line in enumerate(buffer):
+                line_stripped = line.strip()
+                if not line_stripped:
+                    continue
+
+                # Title/bullet heuristics live in headings.py (compiled once at import)
+                is_new_entry_title = is_entry_title(line_stripped)
+
+                # Also consider lines that look like main company/role/project names that aren't action verbs
+                # and are followed by what appears to be a bullet or sub-details
+                if not is_new_entry_title and current_entry and not is_likely_bullet(line_stripped) and len(line_stripped.split()) < 10:
+                    # If current line is short, not a bullet, and we have an entry, it might be a subtitle for the current entry
+                    # Append it to the title of the current entry or keep it in bullets if it looks like a sub-detail
+                    current_entry["bullets"].append(line_stripped) # Treat as a descriptive bullet for now
+                    continue
+
+
+                if is_new_entry_title:
+                    if current_entry:
+                        parsed_entries.append(current_entry)
+                    current_entry = {"title": line_stripped, "bullets": []}
+                elif current_entry:
+                    current_entry["bullets"].append(line_stripped)
+                else: # Content before the first detected entry, or if no title is ever found
+                    if not parsed_entries: # If no entries yet, create a dummy one or append to a conceptual 'header'
+                        parsed_entries.append({"title": "", "bullets": [line_stripped]})
+                    else: # If previous entries exist but this line doesn't fit a new title, append to last entry's bullets
+                         parsed_entries[-1]["bullets"].append(line_stripped)
+
+            if current_entry:
+                parsed_entries.append(current_entry)
+
+            # Final cleanup: remove entries with empty titles and no bullets, or empty bullets
+            final_entries = []
+            for entry in parsed_entries:
+                if entry.get("title") or entry.get("bullets"): # Keep if has title OR bullets
+                    if entry.get("bullets"):
+                        entry["bullets"] = [b for b in entry["bullets"] if b.strip()] # Clean empty bullets
+                    final_entries.append(entry)
+
+            # Fallback: if structured parsing yields nothing, return original buffer as simple strings
+            if not final_entries and buffer:
+                 return [line.strip() for line in buffer if line.strip()]
+
+            return final_entries if final_entries else []
+        else:
+            # For other sections, return simple list of non-empty strings
+            return [line.strip() for line in buffer if line.strip()]
+
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        is_heading_found = False
+        potential_heading_lower = line.replace(':', '').strip().lower()
+
+        heading = classifier.classify(potential_heading_lower)
+        if heading:
+            if current_section: # If we have an active section, process its buffer
+                sections[current_section] = _process_buffer(current_section, temp_content_buffer)
+                temp_content_buffer = [] # Reset buffer
+            current_section = heading # Canonical name, e.g. "Work Experience" -> "Experience"
+            is_heading_found = True
+
+        # Fallback heading detection (e.g., ALL CAPS lines, or lines ending with colon)
+        if not is_heading_found and ((line.isupper() and len(line.split()) < 6) or \
+           (_COLON_HEADING.match(line) and len(line.split()) < 6)):
+            if current_section:
+                sections[current_section] = _process_buffer(current_section, temp_content_buffer)
+                temp_content_buffer = []
+            current_section = line.rstrip(':').strip().title()
+            is_heading_found = True
+        
+        if is_heading_found:
+            if current_section not in sections:
+                sections[current_section] = [] # Initialize if new section
+
+        elif current_section:
+            temp_content_buffer.append(line)
+        else: # Lines before any recognized section (often part of an implicit header/summary)
+            if "Header/Summary" not in sections:
+                sections["Header/Summary"] = []
+            sections["Header/Summary"].append(line)
+
+    # Process any remaining content in the buffer after the loop finishes
+    if current_section and temp_content_buffer:
+        sections[current_section] = _process_buffer(current_section, temp_content_buffer)
+
+    # Clean empty sections
+    cleaned_sections = OrderedDict()
+    for k, v in sections.items():
+        if v: # Check if the content is not empty
+            if k in ["Experience", "Projects"]:
+                # For structured sections, ensure individual entries have content
+                filtered_entries = [entry for entry in v if entry.get("title") or entry.get("bullets")]
+                if filtered_entries:
+                    cleaned_sections[k] = filtered_entries
+            else:
+                # For string-list sections, ensure content is not empty
+                filtered_content = [item for item in v if item.strip()]
+                if filtered_content:
+                    cleaned_sections[k] = filtered_content
+    
+    # If "Header/Summary" is present but empty after cleaning, remove it
+    if "Header/Summary" in cleaned_sections and not cleaned_sections["Header/Summary"]:
+        del cleaned_sections["Header/Summary"]
+
+    return cleaned_sections
+
+
+# --- Gemini Generation ---
+
+GEMINI_SAFETY_SETTINGS = {
+    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
+    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
+    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
+    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
+}
+REFINE_GENERATION_CONFIG = {"temperature": 0.7, "max_output_tokens": 4000}
+COVER_LETTER_GENERATION_CONFIG = {"temperature": 0.7, "max_output_tokens": 1000}
+
+def _record_prompt_report(report):
+    """Logs a prompt's token estimate and counts it in the metrics (per-section prompts count as "refine")."""
+    logger.info(f"Prompt budget {report}")
+    get_metrics().record_tokens(report.kind.split(":")[0], report.total)
+
+def _cached_response(prompt, generation_config, model_name, response_cache):
+    """Returns (cached text or None, key to store under once a fresh response parses)."""
+    if response_cache is None:
+        return None, None
+    cache_key = response_cache.key(prompt, model_name, generation_config)
+    cached = response_cache.get(cache_key)
+    get_metrics().record_cache("llm_response", cached is not None)
+    return cached, (None if cached is not None else cache_key)
+
+def _generate_text(prompt, generation_config, response_cache=None, llm_client=None):
+    """Calls Gemini and returns (response text, cache key to store under once the text parses).
+
+    With a response_cache (see llm_cache.py) an identical earlier request is
+    answered from the cache; the returned key is then None since it is already stored.
+    Calls go through llm_client (see llm_client.py) for rate limiting and retries.
+    """
+    client = llm_client or get_llm_client()
+    cached, cache_key = _cached_response(prompt, generation_config, client.model_name, response_cache)
+    if cached is not None:
+        return cached, None
+    return client.generate_sync(prompt, generation_config, GEMINI_SAFETY_SETTINGS), cache_key
+
+async def _generate_text_async(prompt, generation_config, response_cache=None, llm_client=None):
+    """Async counterpart of _generate_text."""
+    client = llm_client or get_llm_client()
+    cached, cache_key = _cached_response(prompt, generation_config, client.model_name, response_cache)
+    if cached is not None:
+        return cached, None
+    return await client.generate(prompt, generation_config, GEMINI_SAFETY_SETTINGS), cache_key
+
+def build_refine_prompt(sections, keywords, jd_keywords, language="english", position_title="Desired Position",
+                        report=None):
+    """Builds the resume refinement prompt, recording its token usage in report (a PromptReport)."""
+    report = report or PromptReport("refine")
+    # `sections` should now contain structured data for Experience/Projects from parse_resume_sections
+    resume_json = report.add("sections", compact_json(sections))
+    keyword_list = report.add("keywords", ', '.join(unique_terms(keywords, jd_keywords)))
+
+    lang_instruction = "Respond in French" if language == "french" else "Respond in English"
+
+    prompt = f"""You are an expert resume writer. Refine the following resume sections to be ATS-friendly and tailored to the job description.
+
+CRITICAL REQUIREMENTS:
+1. {lang_instruction} throughout the entire response
+2. Preserve ALL original factual information (dates, companies, roles, project names, education details). DO NOT OMIT OR EMPTY EXISTING SECTIONS.
+3. Bold relevant keywords using <b></b> HTML tags: {keyword_list}
+4. Maximum 2 pages total length - be extremely concise
+5. For Experience/Projects: Maximum 3-4 bullet points per entry, starting with action verbs. Ensure each entry has detailed accomplishments.
+6. Add a compelling Professional Summary (3-4 sentences) highlighting top skills for '{position_title}'
+7. If Experience or Projects sections are genuinely empty in the *input*, create realistic entries based on skills/education with "(inferred)" note. If they are *not* empty, preserve and refine their content.
+
+FORMATTING RULES:
+- No bullet prefixes (•, -, *, bullet) - start directly with content
+- Bold project names: <b>Project Name</b>
+- Quantify achievements wherever possible
+- Use action verbs (Led, Developed, Implemented, etc.)
+
+SECTION HANDLING:
+- Skills: Focus on job-relevant skills only, bold keywords
+- Experience: Provide as an array of JSON objects, each with 'title' (e.g., 'Company – Role | Dates') and 'bullets' (array of strings).
+- Projects: Provide as an array of JSON objects, each with 'title' (e.g., '<b>Project Name</b>') and 'bullets' (array of strings).
+- Education: Institution, Degree, Year, relevant details (e.g., Institution – Degree | Year)
+
+Return ONLY a valid JSON object where section names are keys. For "Experience" and "Projects" sections, the value should be an array of objects, each with "title" (e.g., "Company – Role | Dates" or "Project Name") and "bullets" (array of strings for bullet points). For other sections, the value should be an array of strings.
+
+Example for Experience entry:
+{{
+  "Experience": [
+    {{
+      "title": "Infosys – Senior System Engineer | Jan 2024 - Present",
+      "bullets": [
+        "Designed robust forms using Spring Boot and Spring Data JPA, managing patient, clinic, and clinician records.",
+        "Developed real-time monitoring and alerting using WebSockets and Spring Security, reducing response time by 40%.",
+        "Led microservices architecture migration, improving system scalability by 30%."
+      ]
+    }}
+  ]
+}}
+
+Example for Project entry:
+{{
+  "Projects": [
+    {{
+      "title": "<b>Journal App</b>",
+      "bullets": [
+        "Developed a secure journaling backend using Spring Boot and JWT-based authentication; integrated external APIs and deployed on Heroku.",
+        "Leveraged Kafka and Redis for message brokering and caching; built efficient CRUD endpoints with robust error handling."
+      ]
+    }}
+  ]
+}}
+
+Resume Sections: {resume_json}"""
+    report.finish(prompt)
+    _record_prompt_report(report)
+    return prompt
+
+def _normalize_entries(items):
+    """Coerces Experience/Projects items into {"title", "bullets"} dicts."""
+    # Ensure each item in the list is a dict with 'title' and 'bullets'
+    processed_items = []
+    for item in items:
+        if isinstance(item, dict) and "title" in item and "bullets" in item and isinstance(item["bullets"], list):
+            processed_items.append(item)
+        elif isinstance(item, str): # Fallback if Gemini sends it as flat strings
+            lines = [line.strip() for line in item.split('\n') if line.strip()]
+            if lines:
+                title = lines[0]
+                bullets = lines[1:]
+                processed_items.append({"title": title, "bullets": bullets})
+            else: # If string is empty or just whitespace
+                processed_items.append({"title": "", "bullets": []})
+        # Handle other unexpected dict formats by attempting conversion
+        elif isinstance(item, dict):
+             title_candidate = item.get("title") or next(iter(item.keys()), "")
+             bullets_candidate = [str(v) for v in item.values()] if not item.get("bullets") else item["bullets"]
+             if isinstance(bullets_candidate, str): bullets_candidate = [bullets_candidate] # Ensure bullets is a list
+             processed_items.append({"title": title_candidate, "bullets": bullets_candidate})
+    return processed_items
+
+def parse_refined_response(text):
+    """Parses Gemini's refinement response into the section schema used by parse_resume_sections."""
+    json_match = re.search(r'\{[\s\S]*\}', text)
+    if json_match:
+        refined_data = json.loads(json_match.group(0))
+        # The post-processing for Experience and Projects is now primarily handled by parse_resume_sections.
+        # We keep a minimal check here for robustness if Gemini deviates.
+        for section_key in ['Experience', 'Projects']:
+            if section_key in refined_data and isinstance(refined_data[section_key], list):
+                refined_data[section_key] = _normalize_entries(refined_data[section_key])
+        return refined_data
+    return json.loads(text)
+
+def batch_refine_resume_gemini(sections, keywords, jd_keywords, gemini_api_key, language="english",
+                               position_title="Desired Position", response_cache=None, llm_client=None,
+                               per_section=False):
+    """Refines resume sections using Gemini API with improved prompts.
+
+    per_section=True sends one request per section (see refine_resume_by_section_async)
+    instead of a single prompt for the whole resume.
+    """
+    if per_section:
+        return asyncio.run(refine_resume_by_section_async(
+            sections, keywords, jd_keywords, language, position_title, response_cache, llm_client))
+
+    prompt = build_refine_prompt(sections, keywords, jd_keywords, language, position_title)
+
+    try:
+        text, cache_key = _generate_text(prompt, REFINE_GENERATION_CONFIG, response_cache, llm_client)
+        refined_data = parse_refined_response(text)
+        if cache_key:
+            response_cache.put(cache_key, text)
+        return refined_data
+    except (json.JSONDecodeError, api_exceptions.GoogleAPIError, Exception) as e:
+        logger.error(f"Error refining resume: {e}")
+        return None
+
+async def refine_resume_gemini_async(sections, keywords, jd_keywords, language="english",
+                                     position_title="Desired Position", response_cache=None, llm_client=None,
+                                     per_section=False):
+    """Async variant of batch_refine_resume_gemini for running many refinements concurrently."""
+    if per_section:
+        return await refine_resume_by_section_async(
+            sections, keywords, jd_keywords, language, position_title, response_cache, llm_client)
+
+    prompt = build_refine_prompt(sections, keywords, jd_keywords, language, position_title)
+
+    try:
+        text, cache_key = await _generate_text_async(prompt, REFINE_GENERATION_CONFIG, response_cache, llm_client)
+        refined_data = parse_refined_response(text)
+        if cache_key:
+            response_cache.put(cache_key, text)
+        return refined_data
+    except (json.JSONDecodeError, api_exceptions.GoogleAPIError, Exception) as e:
+        logger.error(f"Error refining resume: {e}")
+        return None
+
+def iter_refined_sections(sections, keywords, jd_keywords, language="english",
+                          position_title="Desired Position", response_cache=None, llm_client=None):
+    """Streams the refinement and yields (section name, content) as each section of the response completes.
+
+    Unlike batch_refine_resume_gemini this raises on API or parse errors,
+    since some sections may already have been shown to the user.
+    """
+    prompt = build_refine_prompt(sections, keywords, jd_keywords, language, position_title)
+    client = llm_client or get_llm_client()
+    cached, cache_key = _cached_response(prompt, REFINE_GENERATION_CONFIG, client.model_name, response_cache)
+    if cached is not None:
+        yield from parse_refined_response(cached).items()
+        return
+
+    parser = TopLevelObjectParser()
+    emitted = 0
+    for chunk in client.stream_sync(prompt, REFINE_GENERATION_CONFIG, GEMINI_SAFETY_SETTINGS):
+        for section_name, content in parser.feed(chunk):
+            if section_name in ('Experience', 'Projects') and isinstance(content, list):
+                content = _normalize_entries(content)
+            emitted += 1
+            yield section_name, content
+
+    if not parser.done:
+        if emitted:
+            raise ValueError("response ended before the JSON object was complete (output may be truncated)")
+        # Nothing object-shaped was streamed; fall back to whole-text parsing.
+        yield from parse_refined_response(parser.text).items()
+    if cache_key:
+        response_cache.put(cache_key, parser.text)
+
+# --- Per-Section Refinement ---
+
+STRUCTURED_SECTIONS = ("Experience", "Projects")
+SECTION_GENERATION_CONFIG = {"temperature": 0.7, "max_output_tokens": 1500}
+# Experience/Projects entries per request when a structured section is split up.
+ENTRIES_PER_REQUEST = 3
+
+SECTION_RULES = {
+    "Experience": 'Value: an array of objects with "title" (e.g. "Company – Role | Dates") and "bullets" (array of strings). '
+                  'Maximum 3-4 bullets per entry, starting with action verbs, quantified wherever possible.',
+    "Projects": 'Value: an array of objects with "title" (e.g. "<b>Project Name</b>") and "bullets" (array of strings). '
+                'Maximum 3-4 bullets per entry, starting with action verbs; bold project names.',
+    "Skills": "Value: an array of strings. Focus on job-relevant skills only, bold keywords.",
+    "Education": "Value: an array of strings such as \"Institution – Degree | Year\" plus relevant details.",
+    "Professional Summary": "Value: an array with one compelling 3-4 sentence summary highlighting top skills for the position.",
+}
+
+def build_section_refine_prompt(section_name, content, keywords, jd_keywords, language="english",
+                                position_title="Desired Position", report=None):
+    """Builds a refinement prompt for one section (or one group of Experience/Projects entries)."""
+    report = report or PromptReport(f"refine:{section_name}")
+    section_json = report.add("sections", compact_json(content))
+    keyword_list = report.add("keywords", ', '.join(unique_terms(keywords, jd_keywords)))
+    lang_instruction = "Respond in French" if language == "french" else "Respond in English"
+    rules = SECTION_RULES.get(section_name, "Value: an array of strings.")
+    prompt = f"""You are an expert resume writer refining ONE section of a resume for the position '{position_title}'. Make it ATS-friendly and concise.
+
+RULES:
+1. {lang_instruction}
+2. Preserve ALL original factual information (dates, companies, roles, project names, education details). Do not drop entries.
+3. Bold relevant keywords using <b></b> HTML tags: {keyword_list}
+4. No bullet prefixes (•, -, *, bullet) - start directly with content
+5. {rules}
+
+Return ONLY a JSON object with the single key "{section_name}".
+
+{section_name}: {section_json}"""
+    report.finish(prompt)
+    _record_prompt_report(report)
+    return prompt
+
+def _section_summary_source(sections):
+    """Compact view of the resume used to write a Professional Summary when the input has none."""
+    source = OrderedDict()
+    for name in ("Skills", "Experience", "Projects", "Education"):
+        if name in sections:
+            items = sections[name]
+            source[name] = [item.get("title", "") if isinstance(item, dict) else item for item in items]
+    return source
+
+def plan_section_requests(sections):
+    """Splits a resume into (section name, content) requests; structured sections are chunked by entry."""
+    requests_plan = []
+    if not any(name in sections for name in ("Professional Summary", "Summary")):
+        requests_plan.append(("Professional Summary", _section_summary_source(sections)))
+    for name, content in sections.items():
+        if name in STRUCTURED_SECTIONS and len(content) > ENTRIES_PER_REQUEST:
+            for start in range(0, len(content), ENTRIES_PER_REQUEST):
+                requests_plan.append((name, content[start:start + ENTRIES_PER_REQUEST]))
+        else:
+            requests_plan.append((name, content))
+    return requests_plan
+
+async def _refine_one_section(section_name, content, keywords, jd_keywords, language, position_title,
+                              response_cache, llm_client):
+    prompt = build_section_refine_prompt(section_name, content, keywords, jd_keywords, language, position_title)
+    text, cache_key = await _generate_text_async(prompt, SECTION_GENERATION_CONFIG, response_cache, llm_client)
+    refined = parse_refined_response(text)
+    value = refined.get(section_name)
+    if value is None and len(refined) == 1:
+        value = next(iter(refined.values()))
+    if not isinstance(value, list):
+        raise ValueError(f"unexpected response shape for section '{section_name}'")
+    if cache_key:
+        response_cache.put(cache_key, text)
+    return value
+
+async def refine_resume_by_section_async(sections, keywords, jd_keywords, language="english",
+                                         position_title="Desired Position", response_cache=None, llm_client=None):
+    """Refines each section (and each group of Experience/Projects entries) in its own concurrent request.
+
+    Results are merged back into the same section schema in the original
+    order. A section whose request fails keeps its original content; None is
+    returned only if every request fails.
+    """
+    requests_plan = plan_section_requests(sections)
+    results = await asyncio.gather(*[
+        _refine_one_section(name, content, keywords, jd_keywords, language, position_title,
+                            response_cache, llm_client)
+        for name, content in requests_plan
+    ], return_exceptions=True)
+
+    refined = OrderedDict()
+    failures = 0
+    for (name, content), result in zip(requests_plan, results):
+        if isinstance(result, BaseException):
+            failures += 1
+            logger.warning(f"Error refining section '{name}', keeping original content: {result}")
+            if name == "Professional Summary" and name not in sections:
+                continue
+            result = content
+        refined.setdefault(name, []).extend(result)
+
+    if failures == len(requests_plan):
+        logger.error("Error refining resume: every section request failed")
+        return None
+    return refined
+
+def _photo_reader(photo):
+    """Returns an ImageReader for a photo given as a path, bytes or binary file object, or None.
+
+    The photo is cropped and downsampled to its printed size (see photo.py), so
+    the PDF embeds a few kilobytes instead of the original upload.
+    """
+    if not photo:
+        return None
+    if isinstance(photo, (str, os.PathLike)) and not os.path.exists(photo):
+        return None
+    from pdf_render import PHOTO_SIZE
+    from photo import get_photo_processor
+    with _open_binary(photo) as f:
+        data = f.read()
+    return get_photo_processor().reader(data, PHOTO_SIZE, PHOTO_SIZE)
+
+def create_modern_resume_pdf(sections, filename, personal_info, photo=None):
+    """Creates a modern, ATS-friendly resume PDF.
+
+    filename may be a path or a writable binary buffer. With filename=None the
+    PDF is rendered in memory and its bytes are returned. photo may be a path,
+    bytes or a binary file object.
+    """
+    try:
+        photo_image = _photo_reader(photo)
+    except Exception as e:
+        logger.warning(f"Photo error: {e}")
+        photo_image = None
+
+    output = filename if filename is not None else io.BytesIO()
+    try:
+        from pdf_render import get_pdf_renderer
+        get_pdf_renderer().render_resume(sections, output, personal_info, photo_image)
+    except Exception as e:
+        logger.error(f"Error creating resume PDF: {e}")
+        return None
+    return output.getvalue() if filename is None else None
+
+def build_cover_letter_prompt(job_description, resume_sections, personal_info,
+                              company_name, recruiter_name, position_title, language="english",
+                              jd_token_budget=None, resume_token_budget=None, report=None):
+    """Builds the cover letter prompt.
+
+    The job description and resume are cut to their token budgets by keeping
+    the spans most relevant to the JD's own keywords and the position title,
+    instead of truncating to a fixed number of characters.
+    """
+    jd_token_budget = jd_token_budget or DEFAULT_JD_TOKEN_BUDGET
+    resume_token_budget = resume_token_budget or DEFAULT_RESUME_TOKEN_BUDGET
+    report = report or PromptReport("cover_letter", budget=jd_token_budget + resume_token_budget)
+
+    def format_resume_for_prompt(sections: dict) -> str:
+            output = ""
+            for section, entries in sections.items():
+                output += f"\n### {section}\n"
+                for item in entries:
+                    if isinstance(item, dict):  # For structured sections
+                        title = item.get("title", "")
+                        bullets = item.get("bullets", [])
+                        if title:
+                            output += f"{title}\n"
+                        if isinstance(bullets, list):
+                            for bullet in bullets:
+                                output += f"- {bullet}\n"
+                    elif isinstance(item, str):
+                        output += f"- {item}\n"
+            return output
+
+    focus_terms = unique_terms(extract_keywords(job_description, top_n=30, language=language),
+                               re.findall(r'\w+', position_title.lower()))
+    jd_excerpt = report.add("job_description", trim_to_budget(job_description, jd_token_budget, focus_terms))
+    resume_summary = report.add("resume", trim_to_budget(format_resume_for_prompt(resume_sections),
+                                                         resume_token_budget, focus_terms))
+    personal_json = report.add("personal_info", compact_json({k: v for k, v in personal_info.items() if v}))
+    lang_instruction = "Respond in French" if language == "french" else "Respond in English"
+
+    prompt = f"""You are an expert cover letter writer. Create a professional, compelling cover letter in {language}.
+
+REQUIREMENTS:
+1. {lang_instruction} throughout
+2. Address to "{recruiter_name}" (use "Madame, Monsieur" if French and generic, "Dear Sir or Madam" if English)
+3. Position: {position_title} at {company_name}
+4. Bold relevant keywords using <b></b> tags
+5. Include quantifiable achievements
+6. Professional yet enthusiastic tone
+7. Maximum 400 words for main content
+
+STRUCTURE (return as JSON):
+{{
+  "opening": "Opening paragraph expressing interest and company knowledge",
+  "body_paragraphs": [
+    "Paragraph 1: Relevant experience and skills match",
+    "Paragraph 2: Specific achievements and value proposition"
+  ],
+  "achievements": [
+    "Achievement 1 with metrics",
+    "Achievement 2 with metrics"
+  ],
+  "closing": "Professional closing expressing interview interest"
+}}
+
+JOB DESCRIPTION: {jd_excerpt}
+RESUME: {resume_summary}
+PERSONAL INFO: {personal_json}"""
+    report.finish(prompt)
+    _record_prompt_report(report)
+    return prompt
+
+def parse_cover_letter_response(text):
+    """Parses Gemini's cover letter response into its JSON structure."""
+    json_match = re.search(r'\{[\s\S]*\}', text)
+    if json_match:
+        return json.loads(json_match.group(0))
+    return json.loads(text)
+
+def generate_cover_letter_content(google_gemini_api_key, job_description, resume_sections,
+                                personal_info, company_name, recruiter_name, position_title, language="english",
+                                response_cache=None, llm_client=None):
+    """Generates cover letter content using Gemini API."""
+    prompt = build_cover_letter_prompt(job_description, resume_sections, personal_info,
+                                       company_name, recruiter_name, position_title, language)
+
+    try:
+        text, cache_key = _generate_text(prompt, COVER_LETTER_GENERATION_CONFIG, response_cache, llm_client)
+        content = parse_cover_letter_response(text)
+        if cache_key:
+            response_cache.put(cache_key, text)
+        return content
+    except (json.JSONDecodeError, api_exceptions.GoogleAPIError, Exception) as e:
+        logger.error(f"Error generating cover letter: {e}")
+        return None
+
+async def generate_cover_letter_content_async(job_description, resume_sections, personal_info,
+                                              company_name, recruiter_name, position_title, language="english",
+                                              response_cache=None, llm_client=None):
+    """Async variant of generate_cover_letter_content."""
+    prompt = build_cover_letter_prompt(job_description, resume_sections, personal_info,
+                                       company_name, recruiter_name, position_title, language)
+
+    try:
+        text, cache_key = await _generate_text_async(prompt, COVER_LETTER_GENERATION_CONFIG, response_cache, llm_client)
+        content = parse_cover_letter_response(text)
+        if cache_key:
+            response_cache.put(cache_key, text)
+        return content
+    except (json.JSONDecodeError, api_exceptions.GoogleAPIError, Exception) as e:
+        logger.error(f"Error generating cover letter: {e}")
+        return None
+
+def create_cover_letter_pdf(filename, personal_info, company_info, position_title,
+                          cover_letter_content, language="english"):
+    """Creates a professional cover letter PDF.
+
+    Like create_modern_resume_pdf, filename=None renders in memory and returns the bytes.
+    """
+    output = filename if filename is not None else io.BytesIO()
+    try:
+        from pdf_render import get_pdf_renderer
+        get_pdf_renderer().render_cover_letter(output, personal_info, company_info, position_title,
+                                               cover_letter_content, language)
+    except Exception as e:
+        logger.error(f"Error creating cover letter PDF: {e}")
+        return None
+    return output.getvalue() if filename is None else None
+
+# --- Headless Pipeline ---
+
+def choose_language(resume_content, job_description):
+    """Picks the output language: the shared language of resume and JD, otherwise English."""
+    detector = get_language_detector()
+    resume_lang = detector.detect(resume_content)
+    jd_lang = detector.detect(job_description)
+    logger.info(f"Language probabilities: resume {detector.probabilities(resume_content)}, "
+                f"job description {detector.probabilities(job_description)}")
+    return resume_lang if resume_lang == jd_lang else 'english'
+
+def analyze_resume(resume_path, job_description):
+    """Runs the CPU-bound stages for one resume file and returns everything the LLM stage needs."""
+    # Documents are already spread across processes by the caller, so keep
+    # page extraction serial here instead of nesting another pool.
+    resume_content = extract_text(resume_path, parallel=False)
+    if not resume_content:
+        return None
+
+    final_lang = choose_language(resume_content, job_description)
+    return {
+        "personal_info": extract_personal_details(resume_content),
+        "language": final_lang,
+        "resume_keywords": extract_keywords(resume_content, language=final_lang),
+        "jd_keywords": extract_keywords(job_description, language=final_lang),
+        "sections": parse_resume_sections(resume_content, detect_language(resume_content)),
+    }
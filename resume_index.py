@@ -0,0 +1,354 @@
+"""Persistent inverted index of resumes, ranked against a job description.
+
+Each resume's parsed sections (parse_resume_sections) are tokenized the same
+way as extract_keywords (stopwords removed, unigrams and bigrams), normalized
+(SKILL_ALIASES) and stored in SQLite as postings keyed by term:
+
+    postings(term, resume_id, section, tf)   -- primary key starts with term
+
+A query turns the job description into its top terms and reads only the
+postings of those terms. Its cost grows with how many resumes mention the
+query terms, not with the size of the pool. Resumes are scored with BM25 per
+section, and the section scores are combined with SECTION_WEIGHTS (a skill
+listed under Skills counts more than one mentioned under Education). Every
+hit reports its per-section scores and the terms it matched.
+
+    python resume_index.py add resumes/ --index candidates.db
+    python resume_index.py query --jd job.txt --index candidates.db --top-k 10
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from keywords import get_keyword_engine
+
+# Sections left out of the index: the header holds contact details, not skills.
+SKIP_SECTIONS = frozenset({"Header/Summary"})
+SECTION_WEIGHTS = {
+    "Skills": 2.0,
+    "Experience": 1.5,
+    "Projects": 1.0,
+    "Professional Summary": 1.0,
+    "Certifications": 1.0,
+    "Education": 0.5,
+}
+DEFAULT_SECTION_WEIGHT = 0.5
+# Spellings folded into one term so "Postgres" on a resume matches "PostgreSQL" in a posting.
+# Alias keys are kept even when shorter than the keyword engine's min_length, so
+# "Go" is counted (as "golang") rather than dropped.
+SKILL_ALIASES = {
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "go": "golang",
+    "nodejs": "node",
+    "reactjs": "react",
+    "vuejs": "vue",
+    "sklearn": "scikit learn",
+    "gcp": "google cloud",
+}
+INDEX_NGRAMS = (1, 2)
+
+
+def section_text(content):
+    """Flattens one parsed section (strings or {"title", "bullets"} entries) into plain text."""
+    parts = []
+    for item in content:
+        if isinstance(item, dict):
+            parts.append(item.get("title", ""))
+            parts.extend(item.get("bullets", []))
+        else:
+            parts.append(str(item))
+    return "\n".join(parts)
+
+
+def normalized_terms(text, language="english"):
+    """Counter of index terms for a text: extract_keywords tokenization plus SKILL_ALIASES."""
+    counts = Counter()
+    for term, count in get_keyword_engine().terms(text, language, INDEX_NGRAMS, keep_short=SKILL_ALIASES).items():
+        counts[SKILL_ALIASES.get(term, term)] += count
+    return counts
+
+
+class ResumeIndex:
+    """SQLite-backed inverted index with per-section BM25 ranking. Thread-safe."""
+
+    def __init__(self, path, k1=1.2, b=0.75, section_weights=None, max_df=0.5):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self.section_weights = section_weights or SECTION_WEIGHTS
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                " id TEXT PRIMARY KEY,"
+                " language TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " added_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " term TEXT NOT NULL,"
+                " resume_id TEXT NOT NULL,"
+                " section TEXT NOT NULL,"
+                " tf INTEGER NOT NULL,"
+                " PRIMARY KEY (term, resume_id, section)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS postings_resume ON postings (resume_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS section_lengths ("
+                " resume_id TEXT NOT NULL,"
+                " section TEXT NOT NULL,"
+                " length INTEGER NOT NULL,"
+                " PRIMARY KEY (resume_id, section)) WITHOUT ROWID"
+            )
+            # Running totals, so queries never aggregate over the whole pool.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS term_df (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS section_stats ("
+                " section TEXT PRIMARY KEY, documents INTEGER NOT NULL, total_length INTEGER NOT NULL)"
+            )
+
+    # --- Ingest ---
+
+    def add(self, resume_id, sections, language="english", metadata=None):
+        """Indexes (or re-indexes) one resume from its parsed sections."""
+        per_section = {}
+        for name, content in sections.items():
+            if name in SKIP_SECTIONS or not content:
+                continue
+            counts = normalized_terms(section_text(content), language)
+            if counts:
+                per_section[name] = counts
+
+        with self._lock, self._conn:
+            self._remove(resume_id)
+            self._conn.execute(
+                "INSERT INTO resumes (id, language, metadata, added_at) VALUES (?, ?, ?, ?)",
+                (resume_id, language, json.dumps(metadata or {}, ensure_ascii=False), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO postings (term, resume_id, section, tf) VALUES (?, ?, ?, ?)",
+                [(term, resume_id, name, tf) for name, counts in per_section.items() for term, tf in counts.items()],
+            )
+            lengths = [(resume_id, name, sum(counts.values())) for name, counts in per_section.items()]
+            self._conn.executemany(
+                "INSERT INTO section_lengths (resume_id, section, length) VALUES (?, ?, ?)", lengths)
+            self._conn.executemany(
+                "INSERT INTO section_stats (section, documents, total_length) VALUES (?, 1, ?)"
+                " ON CONFLICT (section) DO UPDATE SET documents = documents + 1,"
+                " total_length = total_length + excluded.total_length",
+                [(name, length) for _, name, length in lengths],
+            )
+            terms = {term for counts in per_section.values() for term in counts}
+            self._conn.executemany(
+                "INSERT INTO term_df (term, df) VALUES (?, 1) ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                [(term,) for term in terms],
+            )
+
+    def add_text(self, resume_id, text, metadata=None):
+        """Parses, detects the language of and indexes a resume's extracted text."""
+        from language import get_language_detector
+        from pipeline import extract_personal_details, parse_resume_sections
+        metadata = dict(metadata or {})
+        details = extract_personal_details(text)
+        metadata.setdefault("name", details.get("name", ""))
+        metadata.setdefault("email", details.get("email", ""))
+        language = get_language_detector().detect(text)
+        self.add(resume_id, parse_resume_sections(text, language), language, metadata)
+
+    def remove(self, resume_id):
+        with self._lock, self._conn:
+            return self._remove(resume_id)
+
+    def _remove(self, resume_id):
+        """Deletes a resume and updates the running totals; the caller holds the lock and transaction."""
+        if self._conn.execute("SELECT 1 FROM resumes WHERE id = ?", (resume_id,)).fetchone() is None:
+            return False
+        self._conn.execute(
+            "UPDATE term_df SET df = df - 1 WHERE term IN (SELECT DISTINCT term FROM postings WHERE resume_id = ?)",
+            (resume_id,))
+        self._conn.execute("DELETE FROM term_df WHERE df <= 0")
+        for section, length in self._conn.execute(
+                "SELECT section, length FROM section_lengths WHERE resume_id = ?", (resume_id,)).fetchall():
+            self._conn.execute(
+                "UPDATE section_stats SET documents = documents - 1, total_length = total_length - ?"
+                " WHERE section = ?", (length, section))
+        self._conn.execute("DELETE FROM postings WHERE resume_id = ?", (resume_id,))
+        self._conn.execute("DELETE FROM section_lengths WHERE resume_id = ?", (resume_id,))
+        self._conn.execute("DELETE FROM resumes WHERE id = ?", (resume_id,))
+        return True
+
+    # --- Query ---
+
+    def query_terms(self, job_description, language="english", max_terms=30):
+        """The job description's max_terms most distinctive indexed terms, weighted (1 + log tf) * idf.
+
+        Terms no indexed resume contains are skipped (they cannot match), and so
+        are terms in more than max_df of the resumes unless nothing else matches.
+        """
+        counts = normalized_terms(job_description, language)
+        if not counts:
+            return {}
+        documents = self._document_count()
+        df = self._df(list(counts))
+        weights = {term: (1 + math.log(count)) * self._idf(df[term], documents)
+                   for term, count in counts.items() if df.get(term)}
+        # Terms most resumes contain barely separate candidates but dominate the postings read.
+        distinctive = {term: weight for term, weight in weights.items() if df[term] <= self.max_df * documents}
+        return dict(heapq.nlargest(max_terms, (distinctive or weights).items(), key=lambda item: item[1]))
+
+    def query(self, job_description, top_k=10, language=None, max_terms=30):
+        """Top-k resumes for a job description.
+
+        Returns [{"id", "score", "sections": {section: score}, "matched": [terms], "metadata"}],
+        best first. Only postings of the query terms are read.
+        """
+        if language is None:
+            from language import get_language_detector
+            language = get_language_detector().detect(job_description)
+        terms = self.query_terms(job_description, language, max_terms)
+        if not terms:
+            return []
+
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+            average = {section: total / count for section, count, total in self._conn.execute(
+                "SELECT section, documents, total_length FROM section_stats WHERE documents > 0")}
+            placeholders = ",".join("?" * len(terms))
+            df = dict(self._conn.execute(
+                f"SELECT term, df FROM term_df WHERE term IN ({placeholders})", list(terms)).fetchall())
+            rows = self._conn.execute(
+                "SELECT p.term, p.resume_id, p.section, p.tf, l.length FROM postings p"
+                " JOIN section_lengths l ON l.resume_id = p.resume_id AND l.section = p.section"
+                f" WHERE p.term IN ({placeholders})", list(terms)).fetchall()
+
+        section_scores = defaultdict(lambda: defaultdict(float))
+        matched = defaultdict(set)
+        for term, resume_id, section, tf, length in rows:
+            norm = 1 - self.b + self.b * length / (average.get(section) or length)
+            bm25 = self._idf(df.get(term, 0), documents) * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+            # Query terms that are frequent and distinctive in the JD count for more.
+            section_scores[resume_id][section] += bm25 * terms[term] / max(terms.values())
+            matched[resume_id].add(term)
+
+        totals = {
+            resume_id: sum(score * self.section_weights.get(section, DEFAULT_SECTION_WEIGHT)
+                           for section, score in scores.items())
+            for resume_id, scores in section_scores.items()
+        }
+        best = heapq.nlargest(top_k, totals.items(), key=lambda item: item[1])
+        metadata = self._metadata([resume_id for resume_id, _ in best])
+        return [{
+            "id": resume_id,
+            "score": round(score, 4),
+            "sections": {section: round(value, 4) for section, value in sorted(
+                section_scores[resume_id].items(), key=lambda item: item[1], reverse=True)},
+            "matched": sorted(matched[resume_id], key=terms.get, reverse=True),
+            "metadata": metadata.get(resume_id, {}),
+        } for resume_id, score in best]
+
+    @staticmethod
+    def _idf(df, documents):
+        return math.log(1 + (documents - df + 0.5) / (df + 0.5))
+
+    def _document_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def _df(self, terms):
+        with self._lock:
+            df = {}
+            for start in range(0, len(terms), 500):  # stay under SQLite's bound-parameter limit
+                chunk = terms[start:start + 500]
+                df.update(self._conn.execute(
+                    f"SELECT term, df FROM term_df WHERE term IN ({','.join('?' * len(chunk))})", chunk).fetchall())
+            return df
+
+    def _metadata(self, resume_ids):
+        if not resume_ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, metadata FROM resumes WHERE id IN ({','.join('?' * len(resume_ids))})",
+                resume_ids).fetchall()
+        return {resume_id: json.loads(metadata) for resume_id, metadata in rows}
+
+    def stats(self):
+        """Resume, term and posting counts."""
+        with self._lock:
+            return {
+                "resumes": self._conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0],
+                "terms": self._conn.execute("SELECT COUNT(*) FROM term_df").fetchone()[0],
+                "postings": self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _extract(path):
+    """Process-pool worker: (path, extracted text)."""
+    from pipeline import extract_text
+    return path, extract_text(path, parallel=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index resumes and rank them against a job description.")
+    parser.add_argument("--index", default=os.environ.get("RESUME_INDEX_PATH", "resume_index.db"),
+                        help="SQLite index file (defaults to $RESUME_INDEX_PATH or resume_index.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Index a directory of PDF/DOCX resumes")
+    add.add_argument("source")
+    add.add_argument("--workers", type=int, default=None, help="Process pool size for text extraction")
+    query = commands.add_parser("query", help="Top-k resumes for a job description")
+    query.add_argument("--jd", required=True, help="Job description: URL, text file path or literal text")
+    query.add_argument("--top-k", type=int, default=10)
+    commands.add_parser("stats", help="Print index size")
+    args = parser.parse_args(argv)
+
+    index = ResumeIndex(args.index)
+    if args.command == "add":
+        from concurrent.futures import ProcessPoolExecutor
+
+        from batch import RESUME_EXTENSIONS
+        paths = [os.path.join(args.source, entry) for entry in sorted(os.listdir(args.source))
+                 if entry.lower().endswith(RESUME_EXTENSIONS)]
+        indexed = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for path, text in pool.map(_extract, paths):
+                if text:
+                    # Keyed on the absolute path: cv.pdf and cv.docx, or two folders' cv.pdf, are
+                    # different resumes, while re-adding the same file replaces its entry.
+                    index.add_text(os.path.abspath(path), text, {"path": os.path.abspath(path)})
+                    indexed += 1
+        print(f"{indexed}/{len(paths)} resumes indexed; {index.stats()}")
+    elif args.command == "query":
+        from batch import read_job_description
+        for rank, hit in enumerate(index.query(read_job_description(args.jd), args.top_k), 1):
+            sections = ", ".join(f"{name} {score:.2f}" for name, score in hit["sections"].items())
+            print(f"{rank:>3}. {hit['id']:<30} {hit['score']:>8.3f}  [{sections}]  "
+                  f"matched: {', '.join(hit['matched'][:8])}")
+    else:
+        print(json.dumps(index.stats()))
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
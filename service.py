@@ -0,0 +1,525 @@
+"""Local job-queue HTTP service: submit resume/JD jobs, poll or stream their status, download the PDFs.
+
+Usage:
+    GEMINI_API_KEY=... python service.py --port 8502 --workers 4 --store ~/.cache/resume_parser/jobs
+
+Jobs run on a pool of worker threads, separate from any UI session. The CPU
+stages (extraction, parsing, keywords, PDF rendering) go to a process pool,
+and the Gemini calls go through the shared rate-limited LLMClient. Job state
+lives in SQLite and the files in one directory per job under --store.
+Finished jobs are deleted once they are older than --ttl-hours. Jobs that
+were still queued or running when the service stopped are requeued at
+startup.
+
+API (JSON unless noted):
+    POST   /jobs                 {"resume": <base64>, "resume_filename": "cv.pdf", "job_description": text or URL,
+                                  "position_title": "...", "photo": <base64>, "photo_filename": "me.jpg",
+                                  "per_section": false, "personal_info": {...},
+                                  "cover_letter": {"company": "...", "recruiter": "...", "company_city": "..."}}
+                                 -> 202 {"id": ..., "status": "queued"}
+    GET    /jobs/<id>            -> status, stage, error, result (language, refined sections, files)
+    GET    /jobs/<id>/events     -> text/event-stream of status updates until the job finishes
+    GET    /jobs/<id>/<file>     -> application/pdf (resume.pdf, cover_letter.pdf)
+    DELETE /jobs/<id>
+    GET    /health
+
+ServiceClient wraps these calls; main.py uses it when RESUME_SERVICE_URL is set.
+"""
+import argparse
+import base64
+import binascii
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch import render_job
+from pipeline import (
+    analyze_resume,
+    batch_refine_resume_gemini,
+    create_cover_letter_pdf,
+    fetch_job_description,
+    generate_cover_letter_content,
+)
+
+logger = logging.getLogger("resume_pipeline")
+
+TERMINAL_STATUSES = ("done", "failed")
+RESUME_EXTENSIONS = ('.pdf', '.docx')
+PHOTO_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+MAX_REQUEST_BYTES = 32 * 1024 * 1024
+
+
+class JobError(Exception):
+    """A job failed for a reason worth reporting to the client as is."""
+
+
+class JobStore:
+    """SQLite job table plus one file directory per job, with expiry of finished jobs."""
+
+    def __init__(self, root, ttl_seconds=24 * 3600):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "jobs.sqlite3"), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " stage TEXT,"
+                " request TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at)")
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def file_path(self, job_id, name):
+        return os.path.join(self.job_dir(job_id), os.path.basename(name))
+
+    def create(self, request, files):
+        """Stores a new queued job with its input files ({name: bytes}) and returns its id."""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id))
+        for name, data in files.items():
+            with open(self.file_path(job_id, name), "wb") as f:
+                f.write(data)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request, ensure_ascii=False), now, now),
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        """Sets status/stage/error/result (result is stored as JSON) and bumps updated_at."""
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns}, updated_at = ? WHERE id = ?",
+                               (*fields.values(), time.time(), job_id))
+
+    def get(self, job_id):
+        """Returns the job as a dict, or None if it does not exist (or has expired)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, stage, request, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "status", "stage", "request", "result", "error", "created_at", "updated_at")
+        job = dict(zip(keys, row))
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def unfinished(self):
+        """Ids of jobs that were queued or running, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at", TERMINAL_STATUSES
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def purge_expired(self):
+        """Deletes finished jobs last updated more than ttl_seconds ago; returns how many."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (*TERMINAL_STATUSES, cutoff)
+            ).fetchall()
+        for (job_id,) in rows:
+            self.delete(job_id)
+        return len(rows)
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobService:
+    """Runs stored jobs on worker threads; CPU stages go to a process pool."""
+
+    def __init__(self, store, workers=2, cpu_workers=None, response_cache=None, llm_client=None,
+                 purge_interval=300):
+        self.store = store
+        self.response_cache = response_cache
+        self.llm_client = llm_client
+        self.purge_interval = purge_interval
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        # spawn, not fork: forking a process that already runs threads can deadlock the child.
+        self._cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Requeues unfinished jobs and starts the expiry thread."""
+        for job_id in self.store.unfinished():
+            self.store.update(job_id, status="queued", stage=None)
+            self._workers.submit(self._run, job_id)
+        threading.Thread(target=self._purge_loop, name="job-purge", daemon=True).start()
+
+    def submit(self, request, files):
+        job_id = self.store.create(request, files)
+        self._workers.submit(self._run, job_id)
+        return job_id
+
+    def shutdown(self):
+        self._stopped.set()
+        self._workers.shutdown(wait=False, cancel_futures=True)
+        self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _purge_loop(self):
+        while not self._stopped.wait(self.purge_interval):
+            try:
+                purged = self.store.purge_expired()
+                if purged:
+                    logger.info(f"Purged {purged} expired jobs")
+            except Exception as e:
+                logger.error(f"Error purging expired jobs: {e}")
+
+    def _run(self, job_id):
+        job = self.store.get(job_id)
+        if job is None:  # deleted while queued
+            return
+        request = job["request"]
+        started = time.perf_counter()
+        try:
+            self.store.update(job_id, status="running", stage="analyze")
+            job_description = fetch_job_description(request["job_description"])
+            if not job_description:
+                raise JobError("job description is empty or could not be fetched")
+            resume_path = self.store.file_path(job_id, request["resume_file"])
+            analysis = self._cpu_pool.submit(analyze_resume, resume_path, job_description).result()
+            if not analysis:
+                raise JobError("no text extracted from the resume")
+            personal_info = {**analysis["personal_info"], **(request.get("personal_info") or {})}
+            language = analysis["language"]
+            position_title = request["position_title"]
+
+            self.store.update(job_id, stage="refine")
+            refined_sections = batch_refine_resume_gemini(
+                analysis["sections"], analysis["resume_keywords"], analysis["jd_keywords"],
+                None, language, position_title,
+                response_cache=self.response_cache, llm_client=self.llm_client,
+                per_section=request.get("per_section", False)
+            )
+            if not refined_sections:
+                raise JobError("refinement returned no content")
+
+            self.store.update(job_id, stage="render")
+            photo_path = self.store.file_path(job_id, request["photo_file"]) if request.get("photo_file") else None
+            resume_pdf = self.store.file_path(job_id, "resume.pdf")
+            if not self._cpu_pool.submit(render_job, refined_sections, resume_pdf, personal_info, photo_path).result():
+                raise JobError("resume PDF was not written")
+            result = {"language": language, "personal_info": personal_info, "sections": refined_sections,
+                      "files": ["resume.pdf"]}
+
+            cover_letter = request.get("cover_letter")
+            if cover_letter:
+                self.store.update(job_id, stage="cover_letter")
+                content = generate_cover_letter_content(
+                    None, job_description, refined_sections, personal_info,
+                    cover_letter["company"], cover_letter["recruiter"], position_title, language,
+                    response_cache=self.response_cache, llm_client=self.llm_client
+                )
+                if not content:
+                    raise JobError("cover letter generation returned no content")
+                company_info = {
+                    "company": cover_letter["company"], "recruiter": cover_letter["recruiter"],
+                    "company_city": cover_letter.get("company_city", ""),
+                    "date": datetime.date.today().strftime("%B %d, %Y"),
+                }
+                cover_letter_pdf = self.store.file_path(job_id, "cover_letter.pdf")
+                self._cpu_pool.submit(create_cover_letter_pdf, cover_letter_pdf,
+                                      personal_info, company_info, position_title, content, language).result()
+                # create_cover_letter_pdf logs and swallows its own errors, so check the file itself.
+                if not os.path.exists(cover_letter_pdf):
+                    raise JobError("cover letter PDF was not written")
+                result["cover_letter"] = content
+                result["files"].append("cover_letter.pdf")
+
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            self.store.update(job_id, status="done", stage=None, result=result)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self.store.update(job_id, status="failed", error=str(e) or type(e).__name__)
+
+
+# --- HTTP API ---
+
+def parse_submission(body):
+    """Validates a POST /jobs body; returns (request to store, {file name: bytes}). Raises ValueError."""
+    try:
+        payload = json.loads(body)
+        resume = base64.b64decode(payload["resume"], validate=True)
+    except (ValueError, KeyError, TypeError, binascii.Error) as e:
+        raise ValueError(f"expected JSON with a base64 'resume': {e}")
+    resume_ext = os.path.splitext(payload.get("resume_filename", ""))[1].lower()
+    if resume_ext not in RESUME_EXTENSIONS:
+        raise ValueError(f"resume_filename must end in one of {', '.join(RESUME_EXTENSIONS)}")
+    if not (payload.get("job_description") or "").strip():
+        raise ValueError("job_description is required")
+    cover_letter = payload.get("cover_letter")
+    if cover_letter is not None and not (isinstance(cover_letter, dict)
+                                         and cover_letter.get("company") and cover_letter.get("recruiter")):
+        raise ValueError("cover_letter needs 'company' and 'recruiter'")
+
+    files = {f"input{resume_ext}": resume}
+    request = {
+        "resume_file": f"input{resume_ext}",
+        "job_description": payload["job_description"],
+        "position_title": payload.get("position_title") or "Software Engineer",
+        "per_section": bool(payload.get("per_section", False)),
+        "personal_info": payload.get("personal_info") or {},
+        "cover_letter": cover_letter,
+    }
+    if payload.get("photo"):
+        photo_ext = os.path.splitext(payload.get("photo_filename", ""))[1].lower()
+        if photo_ext not in PHOTO_EXTENSIONS:
+            raise ValueError(f"photo_filename must end in one of {', '.join(PHOTO_EXTENSIONS)}")
+        try:
+            files[f"photo{photo_ext}"] = base64.b64decode(payload["photo"], validate=True)
+        except (ValueError, binascii.Error) as e:
+            raise ValueError(f"photo is not valid base64: {e}")
+        request["photo_file"] = f"photo{photo_ext}"
+    return request, files
+
+
+def public_status(job):
+    """The job as returned to clients (no stored request internals)."""
+    return {key: job[key] for key in ("id", "status", "stage", "error", "result", "created_at", "updated_at")}
+
+
+def make_handler(service, poll_interval=0.5):
+    store = service.store
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _job_or_404(self, job_id):
+            job = store.get(job_id)
+            if job is None:
+                self._send_json(404, {"error": "unknown or expired job"})
+            return job
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                return self._send_json(404, {"error": "not found"})
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_REQUEST_BYTES:
+                return self._send_json(413, {"error": f"request larger than {MAX_REQUEST_BYTES} bytes"})
+            try:
+                request, files = parse_submission(self.rfile.read(length))
+            except ValueError as e:
+                return self._send_json(400, {"error": str(e)})
+            job_id = service.submit(request, files)
+            self._send_json(202, {"id": job_id, "status": "queued"})
+
+        def do_GET(self):
+            parts = [part for part in self.path.split("?")[0].split("/") if part]
+            if parts == ["health"]:
+                return self._send_json(200, {"ok": True, "jobs": store.counts()})
+            if len(parts) < 2 or parts[0] != "jobs":
+                return self._send_json(404, {"error": "not found"})
+            job = self._job_or_404(parts[1])
+            if job is None:
+                return
+            if len(parts) == 2:
+                return self._send_json(200, public_status(job))
+            if parts[2:] == ["events"]:
+                return self._stream_events(job)
+            name = parts[2]
+            if len(parts) != 3 or not job["result"] or name not in job["result"]["files"]:
+                return self._send_json(404, {"error": "no such file for this job"})
+            try:
+                with open(store.file_path(job["id"], name), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return self._send_json(404, {"error": "file is no longer available"})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream_events(self, job):
+            """Server-sent events: one event per status/stage change, ending with the final status."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            last = None
+            while job is not None:
+                state = (job["status"], job["stage"])
+                if state != last:
+                    event = json.dumps(public_status(job), ensure_ascii=False)
+                    try:
+                        self.wfile.write(f"data: {event}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                    except OSError:  # client went away
+                        return
+                    last = state
+                if job["status"] in TERMINAL_STATUSES:
+                    return
+                time.sleep(poll_interval)
+                job = store.get(job["id"])
+
+        def do_DELETE(self):
+            parts = [part for part in self.path.split("/") if part]
+            if len(parts) != 2 or parts[0] != "jobs":
+                return self._send_json(404, {"error": "not found"})
+            if self._job_or_404(parts[1]) is None:
+                return
+            store.delete(parts[1])
+            self._send_json(200, {"id": parts[1], "deleted": True})
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+# --- Client ---
+
+class ServiceClient:
+    """Thin client for the job service."""
+
+    def __init__(self, base_url, timeout=30):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def submit(self, resume_bytes, resume_filename, job_description, position_title, photo_bytes=None,
+               photo_filename=None, per_section=False, personal_info=None, cover_letter=None):
+        """Queues a job and returns its id."""
+        payload = {
+            "resume": base64.b64encode(resume_bytes).decode("ascii"),
+            "resume_filename": resume_filename,
+            "job_description": job_description,
+            "position_title": position_title,
+            "per_section": per_section,
+            "personal_info": personal_info or {},
+            "cover_letter": cover_letter,
+        }
+        if photo_bytes:
+            payload["photo"] = base64.b64encode(photo_bytes).decode("ascii")
+            payload["photo_filename"] = photo_filename
+        response = self.session.post(f"{self.base_url}/jobs", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def status(self, job_id):
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def events(self, job_id):
+        """Yields the job status on every change until it is done or failed."""
+        with self.session.get(f"{self.base_url}/jobs/{job_id}/events", stream=True,
+                              timeout=(self.timeout, None)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data: "):
+                    yield json.loads(line[len("data: "):])
+
+    def wait(self, job_id, poll_interval=1.0, timeout=None):
+        """Polls until the job is done or failed and returns its final status."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            status = self.status(job_id)
+            if status["status"] in TERMINAL_STATUSES:
+                return status
+            if deadline and time.monotonic() > deadline:
+                raise TimeoutError(f"job {job_id} still {status['status']} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def download(self, job_id, name="resume.pdf"):
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}/{name}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the resume pipeline as a local job-queue HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--store", default=os.path.join(os.path.expanduser("~"), ".cache", "resume_parser", "jobs"),
+                        help="Directory for the job database and job files")
+    parser.add_argument("--ttl-hours", type=float, default=24, help="Delete finished jobs after this many hours")
+    parser.add_argument("--workers", type=int, default=4, help="Jobs processed concurrently")
+    parser.add_argument("--cpu-workers", type=int, default=None, help="Process pool size for CPU stages")
+    parser.add_argument("--api-key", default=(os.environ.get("GEMINI_API_KEYS") or os.environ.get("GEMINI_API_KEY")
+                                              or os.environ.get("GOOGLE_API_KEY")),
+                        help="Gemini API key, or comma-separated keys to pool")
+    parser.add_argument("--backend", choices=["gemini", "openai", "stub"],
+                        default=os.environ.get("LLM_BACKEND", "gemini"),
+                        help="LLM backend (defaults to $LLM_BACKEND or gemini; stub runs offline)")
+    parser.add_argument("--response-cache", default=None, help="SQLite file for caching Gemini responses")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    if args.backend == "gemini" and not args.api_key:
+        parser.error("a Gemini API key is required (--api-key, $GEMINI_API_KEY or $GEMINI_API_KEYS)")
+
+    from llm_cache import ResponseCache
+    response_cache = ResponseCache(args.response_cache) if args.response_cache else None
+    store = JobStore(args.store, ttl_seconds=args.ttl_hours * 3600)
+    from llm_client import LLMClient, make_backend
+    llm_client = LLMClient(requests_per_minute=float(os.environ.get("GEMINI_RPM", "60")),
+                           max_concurrency=int(os.environ.get("GEMINI_MAX_CONCURRENCY", "4")),
+                           backend=make_backend(args.backend, api_keys=args.api_key and args.api_key.split(",")))
+    service = JobService(store, workers=args.workers, cpu_workers=args.cpu_workers, response_cache=response_cache,
+                         llm_client=llm_client)
+    service.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Serving on http://{args.host}:{args.port} (jobs in {args.store})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    """A small synthetic resume (as PDF and DOCX bytes) and a job description from bench_corpus."""
+    from bench_corpus import generate_job_description, generate_resume, job_description_text, resume_docx, resume_pdf
+    resume = generate_resume(1, "english", "small")
+    other = generate_resume(2, "english", "small")
+    return {
+        "pdf": resume_pdf(resume),
+        "docx": resume_docx(resume),
+        "other_pdf": resume_pdf(other),
+        "jd": job_description_text(generate_job_description(1, "english", "small")),
+    }
+
+
+@pytest.fixture
+def stub_client():
+    """An LLMClient on the offline StubBackend, with no rate limit to speak of."""
+    from llm_backends import StubBackend
+    from llm_client import LLMClient
+    client = LLMClient(backend=StubBackend(seed=1), requests_per_minute=60_000, base_delay=0.01)
+    yield client
+    client.close()
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from batch import load_jobs, run_batch
+from dedup import NearDuplicateIndex
+
+
+@pytest.fixture
+def resumes(tmp_path, corpus):
+    folder = tmp_path / "resumes"
+    folder.mkdir()
+    (folder / "cv.pdf").write_bytes(corpus["pdf"])
+    (folder / "cv.docx").write_bytes(corpus["docx"])
+    (folder / "other.pdf").write_bytes(corpus["other_pdf"])
+    return folder
+
+
+def test_same_stem_files_get_distinct_ids(resumes, corpus):
+    jobs = load_jobs(str(resumes), corpus["jd"], "Backend Engineer")
+    assert sorted(job["id"] for job in jobs) == ["cv-docx", "cv-pdf", "other"]
+
+
+def test_manifest_with_repeated_id_is_rejected(tmp_path, resumes):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text("\n".join(json.dumps({"resume": str(resumes / name), "id": "same"})
+                                  for name in ("cv.pdf", "other.pdf")))
+    with pytest.raises(ValueError, match="same"):
+        load_jobs(str(manifest), "jd", "Engineer")
+
+
+def test_run_batch_offline(tmp_path, resumes, corpus, stub_client):
+    jobs = load_jobs(str(resumes), corpus["jd"], "Backend Engineer")
+    results = run_batch(jobs, str(tmp_path / "out"), workers=2, llm_client=stub_client)
+    assert [result["status"] for result in results] == ["ok"] * 3
+    assert len({result["pdf"] for result in results}) == 3
+    for result in results:
+        assert (tmp_path / "out" / f"{result['id']}.pdf").stat().st_size > 0
+
+
+def test_resubmission_reuses_earlier_refinement(tmp_path, resumes, corpus, stub_client):
+    index = NearDuplicateIndex(str(tmp_path / "dups.db"))
+    jobs = load_jobs(str(resumes), corpus["jd"], "Backend Engineer")
+    run_batch(jobs, str(tmp_path / "first"), workers=2, llm_client=stub_client, dedup_index=index, run_id="1")
+
+    jobs = load_jobs(str(resumes), corpus["jd"], "Backend Engineer")
+    results = {result["id"]: result for result in run_batch(
+        jobs, str(tmp_path / "second"), workers=2, llm_client=stub_client, dedup_index=index,
+        reuse_duplicates=True, run_id="2")}
+    index.close()
+
+    assert all(result["status"] == "ok" for result in results.values())
+    # The same file resubmitted under the same name is matched against its earlier submission.
+    assert results["other"]["duplicate_of"] == "other@1"
+    assert results["other"]["similarity"] == 1.0
+    assert results["other"]["reused_refinement_from"] == "other@1"
@@ -0,0 +1,46 @@
+import pytest
+
+from bulk import DEFAULT_POSITION_TITLE, parse_posting, parse_postings, posting_id
+
+
+def test_pipe_separated_posting():
+    posting = parse_posting("https://example.com/job | Backend Engineer | Acme | Jane Doe")
+    assert posting == {"job_description": "https://example.com/job", "position_title": "Backend Engineer",
+                       "company": "Acme", "recruiter": "Jane Doe"}
+
+
+def test_optional_fields_default():
+    posting = parse_posting("We need a Python developer. |  | Acme")
+    assert posting["position_title"] == DEFAULT_POSITION_TITLE
+    assert posting["company"] == "Acme"
+    assert "recruiter" not in posting
+
+
+def test_json_posting():
+    posting = parse_posting('{"job_description": "Go engineer", "company": "Initech", "recruiter": ""}')
+    assert posting == {"job_description": "Go engineer", "company": "Initech", "position_title": DEFAULT_POSITION_TITLE}
+
+
+def test_blank_line_is_skipped():
+    assert parse_posting("   ") is None
+
+
+@pytest.mark.parametrize("line", ['{"company": "Acme"}', '{"job_description": ""}', " | Engineer | Acme"])
+def test_posting_without_job_description_is_rejected(line):
+    with pytest.raises(ValueError, match="job_description"):
+        parse_posting(line)
+
+
+def test_parse_postings_reports_line_number():
+    with pytest.raises(ValueError, match="line 3"):
+        parse_postings("https://example.com/a\n\n{\"company\": \"Acme\"}\n")
+
+
+def test_parse_postings_reports_invalid_json():
+    with pytest.raises(ValueError, match="line 1"):
+        parse_postings("{not json")
+
+
+def test_posting_id_is_readable():
+    assert posting_id(2, {"company": "Acme Corp", "position_title": "Backend Engineer"}) == "03-acme-corp-backend-engineer"
+    assert posting_id(0, {}) == "01"
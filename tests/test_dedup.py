@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from dedup import (
+    NearDuplicateIndex,
+    MinHasher,
+    document_id,
+    fingerprint,
+    lsh_params,
+    shingles,
+    similarity,
+)
+
+WORDS = ("python go kafka postgres kubernetes terraform designed built led migrated services platform "
+         "payments billing analytics latency throughput team customers reliability incidents").split()
+
+
+def resume(seed, length=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 50)) for _ in range(length))
+
+
+def edit(text, changes, seed=0):
+    rng = random.Random(seed)
+    words = text.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = "edited"
+    return " ".join(words)
+
+
+def test_shingles():
+    assert shingles("a b c", size=5) == {"a b c"}
+    assert shingles("A b c d", size=2) == {"a b", "b c", "c d"}
+    assert shingles("") == set()
+
+
+def test_minhash_estimates_jaccard():
+    a, b = shingles(resume(1)), shingles(edit(resume(1), 15))
+    jaccard = len(a & b) / len(a | b)
+    hasher = MinHasher(num_perm=256, seed=3)
+    assert similarity(hasher.signature(a), hasher.signature(b)) == pytest.approx(jaccard, abs=0.1)
+
+
+def test_signatures_are_deterministic():
+    assert (fingerprint(resume(1)) == fingerprint(resume(1))).all()
+
+
+def test_lsh_midpoint_is_at_or_below_threshold():
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = lsh_params(threshold, 128)
+        assert bands * rows <= 128
+        assert (1 / bands) ** (1 / rows) <= threshold
+
+
+def test_index_finds_edited_copy_but_not_strangers(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dups.db"), threshold=0.8)
+    for seed in range(20):
+        index.ingest(f"cand-{seed}", text=resume(seed))
+    matches = index.ingest("resubmitted", text=edit(resume(7), 3))
+    assert [doc_id for doc_id, _ in matches] == ["cand-7"]
+    assert index.ingest("new", text=resume(99)) == []
+
+
+def test_same_name_resubmission_is_flagged(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dups.db"))
+    first = document_id("resume.pdf", text=resume(1))
+    second = document_id("resume.pdf", text=edit(resume(1), 3))
+    assert first != second
+    index.ingest(first, text=resume(1))
+    assert [doc_id for doc_id, _ in index.ingest(second, text=edit(resume(1), 3))] == [first]
+
+
+def test_identical_reingest_is_not_a_duplicate_of_itself(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dups.db"))
+    doc_id = document_id("resume.pdf", text=resume(1))
+    index.ingest(doc_id, text=resume(1))
+    assert index.ingest(doc_id, text=resume(1)) == []
+    assert len(index) == 1
+
+
+@pytest.mark.parametrize("name", ["dups.db", "dups.npz"])
+def test_index_and_refinements_persist(tmp_path, name):
+    path = str(tmp_path / name)
+    index = NearDuplicateIndex(path)
+    index.ingest("a", text=resume(1))
+    index.record_refinement("a", "ctx", {"Skills": ["Python"]})
+    index.close()
+
+    reopened = NearDuplicateIndex(path)
+    matches = reopened.query(reopened.fingerprint(text=edit(resume(1), 2)))
+    assert reopened.reuse_refinement(matches, "ctx") == ("a", {"Skills": ["Python"]})
+    assert reopened.reuse_refinement(matches, "other") == (None, None)
+    reopened.close()
+
+
+def test_reopening_with_other_params_fails(tmp_path):
+    path = str(tmp_path / "dups.db")
+    NearDuplicateIndex(path).close()
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(path, num_perm=64)
@@ -0,0 +1,36 @@
+from headings import HEADINGS, HeadingClassifier, headings_for
+
+
+def test_english_headings():
+    assert HEADINGS.classify("work experience") == "Experience"
+    assert HEADINGS.classify("technical skills") == "Skills"
+    assert HEADINGS.classify("education") == "Education"
+
+
+def test_long_lines_are_not_headings():
+    assert HEADINGS.classify("i gained experience in many different teams") is None
+    assert HEADINGS.classify("designed the payments platform") is None
+
+
+def test_first_listed_heading_wins():
+    assert HEADINGS.classify("skills and education") == "Education"
+
+
+def test_french_words_do_not_split_english_resumes():
+    assert HEADINGS.classify("grand prix") is None
+    assert HEADINGS.classify("team formation lead") is None
+
+
+def test_french_headings_apply_to_french_resumes():
+    french = headings_for("french")
+    assert french.classify("expérience professionnelle") == "Experience"
+    assert french.classify("formation") == "Education"
+    assert french.classify("skills") == "Skills"
+
+
+def test_register_extends_classifier():
+    classifier = HeadingClassifier([("skills", "Skills")])
+    assert classifier.classify("ausbildung") is None
+    classifier.register([("ausbildung", "Education")])
+    assert classifier.classify("ausbildung") == "Education"
+    assert classifier.headings() == [("skills", "Skills"), ("ausbildung", "Education")]
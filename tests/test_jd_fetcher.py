@@ -0,0 +1,55 @@
+from jd_fetcher import JobDescriptionFetcher, extract_main_content
+
+DESCRIPTION = (
+    "<p>We are hiring a backend engineer to build our payments platform in Go and PostgreSQL.</p>"
+    "<p>You will design APIs, own services in production and mentor two junior engineers.</p>"
+    "<ul><li>Five years of experience with distributed systems and message queues.</li>"
+    "<li>Comfortable with Kubernetes, Terraform and on-call rotations.</li></ul>"
+)
+LINKS = "".join(f'<li><a href="/jobs/{i}">Another interesting opening number {i} in the city</a></li>'
+                for i in range(40))
+PAGE = (f"<html><body><div id='wrapper'><div class='top'>{LINKS[:400]}</div>"
+        f"<div class='posting'>{DESCRIPTION}</div><div class='more'><ul>{LINKS}</ul></div>"
+        "</div></body></html>")
+
+
+def test_posting_block_beats_wrapper_and_link_lists():
+    text = extract_main_content(PAGE, "html.parser")
+    assert text.startswith("We are hiring a backend engineer")
+    assert "Another interesting opening" not in text
+
+
+def test_json_ld_job_posting_is_preferred():
+    html = ('<html><head><script type="application/ld+json">'
+            '{"@type": "JobPosting", "title": "Data Engineer", "description": "<p>Build pipelines.</p>"}'
+            "</script></head><body><div>Unrelated text</div></body></html>")
+    assert extract_main_content(html, "html.parser") == "Data Engineer\nBuild pipelines."
+
+
+def test_memory_cache_is_bounded_lru():
+    fetcher = JobDescriptionFetcher(max_entries=2)
+    for url in ("https://a", "https://b"):
+        fetcher._store(url, {"url": url, "text": url, "checked_at": 0})
+    fetcher._load("https://a")  # a is now the most recently used
+    fetcher._store("https://c", {"url": "https://c", "text": "c", "checked_at": 0})
+    assert list(fetcher._memory) == ["https://a", "https://c"]
+
+
+def test_content_containers_with_chrome_like_names_are_kept():
+    html = ("<html><body><div class='posting'>"
+            "<div class='job-header'><p>We are hiring a data engineer for our Lyon office.</p></div>"
+            "<p>You will build batch and streaming pipelines on Spark and Kafka.</p>"
+            "<p>Three years of experience with Python and SQL are expected.</p></div>"
+            "<div class='cookie-banner'><p>We use cookies to improve this site.</p></div>"
+            "<div class='related_jobs'><p>Senior data engineer in Paris.</p></div></body></html>")
+    text = extract_main_content(html, "html.parser")
+    assert text.startswith("We are hiring a data engineer")
+    assert "streaming pipelines" in text
+    assert "cookies" not in text
+    assert "Senior data engineer in Paris" not in text
+
+
+def test_shared_layout_container_is_not_noise():
+    html = ("<html><body><div id='content' class='shared-layout'>"
+            "<p>You will build batch and streaming pipelines on Spark and Kafka.</p></div></body></html>")
+    assert extract_main_content(html, "html.parser") == "You will build batch and streaming pipelines on Spark and Kafka."
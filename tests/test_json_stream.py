@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from json_stream import TopLevelObjectParser
+
+DOCUMENT = {
+    "Professional Summary": "Engineer with \"quotes\", braces {} and a comma, inside.",
+    "Experience": [{"title": "Acme – Engineer", "bullets": ["Built [things]", "Led 5 people"]}],
+    "Skills": ["Python", "Go"],
+    "Years": 7,
+    "Remote": True,
+}
+
+
+def feed_all(parser, text, size):
+    pairs = []
+    for start in range(0, len(text), size):
+        pairs.extend(parser.feed(text[start:start + size]))
+    return pairs
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_any_chunking_yields_every_pair_in_order(size):
+    text = "```json\n" + json.dumps(DOCUMENT, ensure_ascii=False, indent=2) + "\n```"
+    parser = TopLevelObjectParser()
+    assert feed_all(parser, text, size) == list(DOCUMENT.items())
+    assert parser.done
+
+
+def test_pairs_are_emitted_as_soon_as_values_complete():
+    parser = TopLevelObjectParser()
+    assert parser.feed('{"Skills": ["Python", "G') == []
+    assert parser.feed('o"], "Summary": "Eng') == [("Skills", ["Python", "Go"])]
+    assert parser.feed('ineer"') == [("Summary", "Engineer")]
+    assert parser.feed('}') == []
+    assert parser.done
+
+
+def test_trailing_literal_is_emitted_at_close():
+    parser = TopLevelObjectParser()
+    assert parser.feed('{"a": 1, "b": null}') == [("a", 1), ("b", None)]
+
+
+def test_incomplete_object_is_not_done():
+    parser = TopLevelObjectParser()
+    parser.feed('{"a": [1, 2')
+    assert not parser.done
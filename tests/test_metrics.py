@@ -0,0 +1,25 @@
+import pytest
+
+from metrics import Metrics
+
+
+def errors(metrics, stage):
+    return next(row["errors"] for row in metrics.summary() if row["stage"] == stage)
+
+
+def test_exception_counts_as_error():
+    metrics = Metrics()
+    with pytest.raises(RuntimeError):
+        with metrics.span("refine"):
+            raise RuntimeError("boom")
+    assert errors(metrics, "refine") == 1
+
+
+def test_failed_flag_counts_as_error():
+    metrics = Metrics()
+    with metrics.span("refine") as span:
+        span.failed = True
+    with metrics.span("refine"):
+        pass
+    assert errors(metrics, "refine") == 1
+    assert 'resume_pipeline_stage_errors_total{stage="refine"} 1' in metrics.prometheus_text()
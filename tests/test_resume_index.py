@@ -0,0 +1,53 @@
+import pytest
+
+from resume_index import ResumeIndex, normalized_terms
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ResumeIndex(str(tmp_path / "candidates.db"))
+    index.add("gopher", {"Skills": ["Golang, gRPC, microservices"], "Experience": ["Built payment services"]})
+    index.add("pythonista", {"Skills": ["Python, Django, Celery"], "Experience": ["Built analytics dashboards"]})
+    index.add("javanese", {"Skills": ["Java, Spring, Hibernate"], "Experience": ["Maintained billing systems"]})
+    index.add("dba", {"Skills": ["Postgres, K8s, Terraform"], "Experience": ["Ran database migrations"]})
+    index.add("streamer", {"Skills": ["Kafka, Flink"], "Education": ["Thesis on compilers"]})
+    index.add("gofer", {"Skills": ["Go, Protobuf, Redis"], "Experience": ["Wrote trading services"]})
+    index.add("student", {"Skills": ["Excel"], "Education": ["Thesis on Kafka stream processing"]})
+    yield index
+    index.close()
+
+
+def test_aliases_survive_tokenization():
+    assert normalized_terms("We use Go and golang daily")["golang"] == 2
+    assert normalized_terms("Go developer")["golang"] == 1
+    assert "postgresql" in normalized_terms("Postgres")
+    assert "kubernetes" in normalized_terms("k8s")
+
+
+def test_golang_posting_ranks_go_resume_first(index):
+    hits = index.query("Backend engineer, Golang and gRPC", language="english")
+    assert hits[0]["id"] == "gopher"
+    assert "golang" in hits[0]["matched"]
+
+
+def test_go_resume_matches_golang_posting(index):
+    hits = index.query("Golang developer for Redis trading systems", language="english")
+    assert hits[0]["id"] == "gofer"
+    assert "golang" in hits[0]["matched"]
+
+
+def test_aliases_match_across_spellings(index):
+    hits = index.query("PostgreSQL administrator, Kubernetes operators", language="english")
+    assert hits[0]["id"] == "dba"
+    assert set(hits[0]["matched"]) >= {"postgresql", "kubernetes"}
+
+
+def test_skills_section_outweighs_education(index):
+    ids = [hit["id"] for hit in index.query("Kafka engineer", language="english")]
+    assert ids.index("streamer") < ids.index("student")
+
+
+def test_remove_drops_resume_from_results(index):
+    assert index.remove("gopher")
+    assert "gopher" not in [hit["id"] for hit in index.query("Golang engineer", language="english")]
+    assert index.stats()["resumes"] == 6
@@ -0,0 +1,53 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from service import JobService, JobStore, ServiceClient, make_handler
+
+
+@pytest.fixture
+def client(tmp_path, stub_client):
+    store = JobStore(str(tmp_path / "jobs"))
+    service = JobService(store, workers=1, cpu_workers=1, llm_client=stub_client)
+    service.start()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service, poll_interval=0.05))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield ServiceClient(f"http://127.0.0.1:{server.server_address[1]}"), store
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+    store.close()
+
+
+def test_job_produces_resume_and_cover_letter(client, corpus):
+    service_client, _ = client
+    job_id = service_client.submit(corpus["pdf"], "cv.pdf", corpus["jd"], "Backend Engineer",
+                                   cover_letter={"company": "Acme", "recruiter": "Jane Doe"})
+    status = service_client.wait(job_id, poll_interval=0.05, timeout=60)
+    assert status["status"] == "done", status["error"]
+    assert status["result"]["files"] == ["resume.pdf", "cover_letter.pdf"]
+    for name in status["result"]["files"]:
+        assert service_client.download(job_id, name).startswith(b"%PDF")
+
+
+def test_missing_file_is_404(client, corpus):
+    service_client, store = client
+    job_id = service_client.submit(corpus["pdf"], "cv.pdf", corpus["jd"], "Backend Engineer")
+    assert service_client.wait(job_id, poll_interval=0.05, timeout=60)["status"] == "done"
+    with pytest.raises(requests.HTTPError) as error:
+        service_client.download(job_id, "cover_letter.pdf")
+    assert error.value.response.status_code == 404
+
+    os.remove(store.file_path(job_id, "resume.pdf"))  # e.g. removed by hand while the job is kept
+    with pytest.raises(requests.HTTPError) as error:
+        service_client.download(job_id, "resume.pdf")
+    assert error.value.response.status_code == 404
+
+
+def test_invalid_submission_is_400(client):
+    service_client, _ = client
+    response = service_client.session.post(f"{service_client.base_url}/jobs", json={"resume": "!!"})
+    assert response.status_code == 400
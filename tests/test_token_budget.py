@@ -0,0 +1,40 @@
+from token_budget import estimate_tokens, trim_to_budget, unique_terms
+
+FILLER = " ".join(f"Line {i} about the team, the office and the benefits package." for i in range(60))
+
+
+def test_text_within_budget_is_unchanged():
+    text = "Python developer wanted."
+    assert trim_to_budget(text, 100) == text
+
+
+def test_trimmed_text_fits_budget():
+    assert estimate_tokens(trim_to_budget(FILLER, 50)) <= 50
+
+
+def test_domain_requirements_survive_trimming():
+    jd = ("Strong JavaScript and TypeScript experience required. "
+          "You will own privacy engineering for our cookie consent platform. " + FILLER)
+    trimmed = trim_to_budget(jd, 300)
+    assert "Strong JavaScript and TypeScript experience required." in trimmed
+    assert "You will own privacy engineering for our cookie consent platform." in trimmed
+
+
+def test_page_chrome_is_dropped():
+    jd = ("Please enable JavaScript to view this page. Read our Privacy Policy. "
+          "We use cookies to improve your experience. © 2024 Acme. All rights reserved. "
+          "Build Kubernetes operators in Go. " + FILLER)
+    trimmed = trim_to_budget(jd, 300, focus_terms=["kubernetes"])
+    assert "Build Kubernetes operators in Go." in trimmed
+    for phrase in ("enable JavaScript", "Privacy Policy", "use cookies", "rights reserved"):
+        assert phrase not in trimmed
+
+
+def test_focus_terms_are_preferred():
+    jd = FILLER + " Experience with Terraform and AWS."
+    trimmed = trim_to_budget(jd, 20, focus_terms=["terraform", "aws"])
+    assert "Terraform" in trimmed
+
+
+def test_unique_terms_keeps_first_spelling():
+    assert unique_terms(["Python", "SQL"], ["python", "Go"]) == ["Python", "SQL", "Go"]
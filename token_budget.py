@@ -0,0 +1,113 @@
+"""Prompt token budgeting and compaction.
+
+Token counts are estimated locally (no API round-trip) with the usual ~4
+characters per token heuristic, which is close enough for budgeting Gemini
+prompts. Long inputs are cut to a budget by keeping their most relevant spans
+rather than the first N characters, and every prompt built by the pipeline
+gets a PromptReport listing the estimated tokens per component.
+"""
+import json
+import math
+import os
+import re
+
+CHARS_PER_TOKEN = 4
+DEFAULT_JD_TOKEN_BUDGET = int(os.environ.get("JD_TOKEN_BUDGET", "300"))
+DEFAULT_RESUME_TOKEN_BUDGET = int(os.environ.get("RESUME_TOKEN_BUDGET", "400"))
+
+_SPAN_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+|\s*[•·|]\s*')
+_WORD = re.compile(r'\w+')
+# Navigation, legal and cookie-banner phrases from scraped job pages. Only whole
+# page-chrome phrases: a bare "JavaScript" or "privacy" is usually a requirement.
+_BOILERPLATE = re.compile(
+    r'\b(?:enable javascript|javascript (?:is )?disabled|javascript must be enabled|'
+    r'(?:accept|allow|use of|uses|we use) (?:all )?cookies|cookie (?:policy|settings|preferences|notice)|'
+    r'privacy (?:policy|notice|statement)|terms of (?:use|service)|all rights reserved|'
+    r'sign in|log in|create (?:job )?alert|share this job|apply now|similar jobs|'
+    r'equal opportunity employer)\b|©',
+    re.IGNORECASE
+)
+
+
+def estimate_tokens(text):
+    """Rough token count for a string."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def compact_json(value):
+    """Serializes without indentation or ASCII escaping, which roughly halves the tokens of indented JSON."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def unique_terms(*term_lists):
+    """Merges keyword lists, dropping repeats but keeping first-seen order."""
+    seen = set()
+    merged = []
+    for terms in term_lists:
+        for term in terms:
+            if term.lower() not in seen:
+                seen.add(term.lower())
+                merged.append(term)
+    return merged
+
+
+def trim_to_budget(text, token_budget, focus_terms=()):
+    """Keeps the most relevant spans of text that fit in token_budget, in their original order.
+
+    Spans are sentences/lines. Each is scored by how many focus terms it
+    mentions (per word, so long spans are not favoured), with exact duplicates
+    and boilerplate dropped. Text already within budget is returned unchanged.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    focus = {term.lower() for term in focus_terms}
+    spans = []
+    seen = set()
+    for index, span in enumerate(s.strip() for s in _SPAN_SPLIT.split(text)):
+        key = span.lower()
+        if len(span) < 3 or key in seen or _BOILERPLATE.search(span):
+            continue
+        seen.add(key)
+        words = _WORD.findall(key)
+        hits = sum(1 for word in words if word in focus)
+        score = (hits + 0.1) / math.sqrt(len(words) + 1)
+        spans.append((score, index, span))
+
+    chosen = []
+    used = 0
+    for score, index, span in sorted(spans, key=lambda s: (-s[0], s[1])):
+        cost = estimate_tokens(span) + 1
+        if used + cost > token_budget:
+            continue
+        chosen.append((index, span))
+        used += cost
+    return "\n".join(span for _, span in sorted(chosen))
+
+
+class PromptReport:
+    """Estimated tokens per prompt component for one call."""
+
+    def __init__(self, kind, budget=None):
+        self.kind = kind
+        self.budget = budget
+        self.components = {}
+        self.total = 0
+
+    def add(self, name, text):
+        self.components[name] = self.components.get(name, 0) + estimate_tokens(text)
+        return text
+
+    def finish(self, prompt):
+        """Records the full prompt; whatever the named components don't cover counts as instructions."""
+        self.total = estimate_tokens(prompt)
+        self.components["instructions"] = max(0, self.total - sum(self.components.values()))
+        return prompt
+
+    def as_dict(self):
+        return {"kind": self.kind, "total": self.total, "budget": self.budget, "components": dict(self.components)}
+
+    def __str__(self):
+        parts = ", ".join(f"{name}={tokens}" for name, tokens in self.components.items())
+        budget = f" (budget {self.budget})" if self.budget else ""
+        return f"{self.kind}: ~{self.total} tokens{budget} [{parts}]"